@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,12 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_caches():
+    # pytest не читает TEST_RUNNER: кэш во временном каталоге,
+    # чтобы cache.clear() в тестах не стирал var/cache разработчика
+    from core.test_runner import isolated_caches
+    with isolated_caches():
+        yield
@@ -1,10 +1,14 @@
 from django.urls import path
 
+from core.db import reads_from_replica
+
 from . import views
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech')
+    path('author/', reads_from_replica(views.AboutAuthorView.as_view()),
+         name='author'),
+    path('tech/', reads_from_replica(views.AboutTechView.as_view()),
+         name='tech')
 ]
@@ -0,0 +1,63 @@
+"""Потоковая отдача JSON: строки сериализуются по мере чтения из базы."""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Сколько байт копить перед отправкой очередного куска ответа
+CHUNK_SIZE = 8192
+
+
+def dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def stream_object(head, key, items, tail=None):
+    """
+    Куски JSON-объекта {**head, key: [*items], **tail()}.
+
+    items — итератор уже сериализуемых значений, tail вызывается после
+    него: так в конец ответа попадает то, что стало известно только
+    при чтении строк (например, курсор следующей страницы).
+    """
+    buffer = [dumps(head)[:-1], ',' if head else '', dumps(key), ':[']
+    size = 0
+    for position, item in enumerate(items):
+        encoded = dumps(item)
+        buffer.append(',' + encoded if position else encoded)
+        size += len(encoded)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    extra = tail() if tail else {}
+    buffer.append('],' + dumps(extra)[1:] if extra else ']}')
+    yield ''.join(buffer)
+
+
+class PageRows:
+    """
+    Строки страницы из CursorPaginator.rows_after, прочитанные потоком.
+
+    После обхода в next лежит курсор следующей страницы или None.
+    """
+
+    def __init__(self, paginator, rows, number, serialize):
+        self.paginator = paginator
+        self.rows = rows
+        self.number = number
+        self.serialize = serialize
+        self.next = None
+
+    def __iter__(self):
+        last = None
+        for position, row in enumerate(self.rows.iterator()):
+            if position == self.paginator.per_page:
+                self.next = self.paginator.encode_cursor(
+                    last, self.number + 1
+                )
+                break
+            last = row
+            yield self.serialize(row)
+
+    def tail(self):
+        return {'next': self.next}
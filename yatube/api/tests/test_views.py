@@ -0,0 +1,134 @@
+import base64
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def read_json(response):
+    return json.loads(b''.join(response.streaming_content))
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            'author', first_name='Антон', last_name='Чехов'
+        )
+        cls.reader = User.objects.create_user('reader')
+        cls.group = Group.objects.create(
+            title='Рассказы', slug='stories', description='Короткая проза'
+        )
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Первый')
+        Comment.objects.create(post=cls.posts[0], author=cls.author,
+                               text='Второй')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def walk(self, url, **params):
+        """Пройти все страницы по курсорам, вернуть id постов."""
+        ids = []
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertTrue(response.streaming)
+            data = read_json(response)
+            ids += [post['id'] for post in data['results']]
+            if data['next'] is None:
+                return ids
+            params['after'] = data['next']
+
+    def test_index_pages_through_all_posts(self):
+        """Курсоры next проходят всю ленту без повторов."""
+        ids = self.walk(reverse('api:index'))
+
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_post_format(self):
+        data = read_json(self.client.get(reverse('api:index'),
+                                         {'limit': 1}))
+
+        self.assertEqual(data['results'], [{
+            'id': self.posts[4].id,
+            'text': 'Пост 4',
+            'pub_date': DjangoJSONEncoder().default(self.posts[4].pub_date),
+            'author': {'username': 'author', 'name': 'Антон Чехов'},
+            'group': None,
+            'image': None,
+            'comments_count': 0,
+        }])
+
+    def test_group_and_profile(self):
+        group = read_json(self.client.get(
+            reverse('api:group_posts', args=[self.group.slug])
+        ))
+        self.assertEqual(group['group']['title'], 'Рассказы')
+        self.assertEqual([post['id'] for post in group['results']],
+                         [self.posts[3].id, self.posts[1].id])
+
+        self.client.force_login(self.reader)
+        profile = read_json(self.client.get(
+            reverse('api:profile', args=[self.author.username])
+        ))
+        self.assertEqual(profile['profile']['posts_count'], 5)
+        self.assertEqual(profile['profile']['followers_count'], 1)
+        self.assertTrue(profile['profile']['following'])
+
+    def test_post_with_comments(self):
+        data = read_json(self.client.get(
+            reverse('api:post', args=[self.posts[0].id])
+        ))
+
+        self.assertEqual(data['post']['comments_count'], 2)
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['Первый', 'Второй'])
+
+    def test_follow_feed(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code,
+                         HTTPStatus.UNAUTHORIZED)
+
+        self.client.force_login(self.reader)
+
+        self.assertEqual(self.walk(url),
+                         [post.id for post in reversed(self.posts)])
+
+    def test_crafted_cursors_do_not_break_api(self):
+        """Испорченный курсор — ошибка 400, огромный номер — не 500."""
+        for raw, status in (
+            ('[["2020-01-01T00:00:00", %d], 2]' % 10 ** 30,
+             HTTPStatus.BAD_REQUEST),
+            ('[[null, null], 2]', HTTPStatus.BAD_REQUEST),
+            ('[["2020-01-01T00:00:00", 1], Infinity]', HTTPStatus.OK),
+        ):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            with self.subTest(cursor=raw):
+                response = self.client.get(reverse('api:index'),
+                                           {'after': cursor})
+                self.assertEqual(response.status_code, status)
+
+    def test_errors_are_json(self):
+        for url, params, status in (
+            (reverse('api:post', args=[0]), {}, HTTPStatus.NOT_FOUND),
+            (reverse('api:profile', args=['nobody']), {},
+             HTTPStatus.NOT_FOUND),
+            (reverse('api:index'), {'after': 'broken'},
+             HTTPStatus.BAD_REQUEST),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
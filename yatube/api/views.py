@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import JsonResponse, StreamingHttpResponse
+
+from posts import timelines
+from posts.counters import get_user_stats
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import CursorPaginator
+
+from .streaming import PageRows, stream_object
+
+User = get_user_model()
+
+# Посты читаются через values(): строки-словари без создания моделей
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'image', 'comments_count',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+COMMENT_FIELDS = (
+    'id', 'text', 'created',
+    'author__username', 'author__first_name', 'author__last_name',
+)
+
+
+def _author(row):
+    return {
+        'username': row['author__username'],
+        'name': f"{row['author__first_name']} "
+                f"{row['author__last_name']}".strip(),
+    }
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': _author(row),
+        'group': {
+            'slug': row['group__slug'],
+            'title': row['group__title'],
+        } if row['group__slug'] else None,
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'comments_count': row['comments_count'],
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': _author(row),
+    }
+
+
+def _error(detail, status):
+    return JsonResponse({'detail': detail}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return min(max(size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def _posts_response(request, posts, head=None, ordering=None):
+    """Страница постов после курсора ?after= с курсором next в конце."""
+    fields = POST_FIELDS + tuple(
+        field.lstrip('-') for field in ordering or ()
+    )
+    paginator = CursorPaginator(
+        posts.values(*fields), _page_size(request), ordering=ordering
+    )
+    page = paginator.rows_after(request.GET.get('after'))
+    if page is None:
+        return _error('Некорректный курсор', 400)
+    rows = PageRows(paginator, *page, serialize_post)
+    return StreamingHttpResponse(
+        stream_object(head or {}, 'results', rows, rows.tail),
+        content_type='application/json',
+    )
+
+
+def index(request):
+    return _posts_response(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'slug', 'title', 'description'
+    ).first()
+    if group is None:
+        return _error('Сообщество не найдено', 404)
+    head = {'group': {key: group[key]
+                      for key in ('slug', 'title', 'description')}}
+    return _posts_response(
+        request, Post.objects.filter(group_id=group['id']), head
+    )
+
+
+def profile(request, username):
+    a_user = User.objects.filter(username=username).only(
+        'id', 'username', 'first_name', 'last_name'
+    ).first()
+    if a_user is None:
+        return _error('Пользователь не найден', 404)
+    stats = get_user_stats(a_user)
+    head = {'profile': {
+        'username': a_user.username,
+        'name': a_user.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }}
+    if request.user.is_authenticated:
+        head['profile']['following'] = Follow.objects.filter(
+            user=request.user, author=a_user
+        ).exists()
+    return _posts_response(request, Post.objects.filter(author=a_user), head)
+
+
+def post_view(request, post_id):
+    row = Post.objects.filter(id=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        return _error('Пост не найден', 404)
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    ).order_by('created', 'id')
+    return StreamingHttpResponse(
+        stream_object(
+            {'post': serialize_post(row)}, 'comments',
+            map(serialize_comment, comments.iterator()),
+        ),
+        content_type='application/json',
+    )
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error('Требуется вход', 401)
+    return _posts_response(
+        request, timelines.timeline_posts(request.user),
+        ordering=timelines.ORDERING,
+    )
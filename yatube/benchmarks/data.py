@@ -0,0 +1,133 @@
+"""Генератор воспроизводимых данных для нагрузочных тестов.
+
+Данные вставляются через bulk_create, минуя сигналы, поэтому в конце
+пересчитываются счётчики и ленты подписок.
+"""
+import os
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from PIL import Image
+
+from posts.importing import rebuild_derived
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Масштаб — число постов; остальное считается от него
+SCALES = {
+    'smoke': 200,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+POSTS_PER_USER = 20
+GROUPS = 25
+COMMENTS_PER_POST = 2
+FOLLOWS_PER_USER = 15
+IMAGE_SHARE = 0.2
+IMAGES = 10
+BATCH_SIZE = 2000
+USERNAME = 'bench_user_{}'
+
+
+def _batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _make_images(rng):
+    directory = os.path.join(settings.MEDIA_ROOT, 'posts')
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for number in range(IMAGES):
+        name = f'posts/bench_{number}.jpg'
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (1280, 720), color).save(
+            os.path.join(settings.MEDIA_ROOT, name), 'JPEG'
+        )
+        names.append(name)
+    return names
+
+
+def generate(scale, seed=0, log=print):
+    """Наполнить базу данными масштаба scale (ключ SCALES)."""
+    rng = random.Random(seed)
+    posts_total = SCALES[scale]
+    users_total = max(posts_total // POSTS_PER_USER, 10)
+    now = timezone.now()
+
+    log(f'Пользователи: {users_total}')
+    User.objects.bulk_create(
+        (User(username=USERNAME.format(number))
+         for number in range(users_total)),
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_user_'
+    ).values_list('pk', flat=True))
+
+    log(f'Сообщества: {GROUPS}')
+    Group.objects.bulk_create(
+        (Group(title=f'Сообщество {number}', slug=f'bench-{number}',
+               description='Сообщество для нагрузочных тестов')
+         for number in range(GROUPS)),
+        ignore_conflicts=True,
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-'
+    ).values_list('pk', flat=True))
+    images = _make_images(rng)
+
+    log(f'Посты: {posts_total}')
+    for batch in _batches(range(posts_total)):
+        posts = Post.objects.bulk_create([
+            Post(
+                text=f'Пост для нагрузочного теста номер {number}. ' * 3,
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids) if rng.random() < 0.6
+                else None,
+                image=rng.choice(images) if rng.random() < IMAGE_SHARE
+                else '',
+            )
+            for number in batch
+        ])
+        # pub_date с auto_now_add при вставке всегда «сейчас»,
+        # разносим посты по времени отдельным обновлением
+        for post, number in zip(posts, batch):
+            post.pub_date = now - timedelta(minutes=posts_total - number)
+        Post.objects.bulk_update(posts, ['pub_date'], batch_size=BATCH_SIZE)
+
+    log(f'Комментарии: {posts_total * COMMENTS_PER_POST}')
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    for batch in _batches(range(posts_total * COMMENTS_PER_POST)):
+        Comment.objects.bulk_create([
+            Comment(post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text='Комментарий для нагрузочного теста')
+            for _ in batch
+        ])
+
+    log(f'Подписки: до {users_total * FOLLOWS_PER_USER}')
+    follows = (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rng.sample(
+            user_ids, min(FOLLOWS_PER_USER, len(user_ids))
+        )
+        if author_id != user_id
+    )
+    for batch in _batches(follows):
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+
+    log('Пересчёт счётчиков, лент подписок и поискового индекса')
+    rebuild_derived()
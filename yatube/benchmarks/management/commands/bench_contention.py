@@ -0,0 +1,63 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержки чтения лент во время пачек add_comment '
+            'при прагмах SQLite по умолчанию и из SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', choices=runner.SQLITE_PROFILES,
+            help='Набор прагм; можно повторять. По умолчанию — все.'
+        )
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Секунд на каждый набор прагм.')
+        parser.add_argument('--burst', type=int, default=20,
+                            help='Комментариев в одной пачке записи.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда сохранить JSON-отчёт.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Сравнение прагм имеет смысл только для SQLite')
+        results = {}
+        for profile in options['profile'] or runner.SQLITE_PROFILES:
+            pragmas = (runner.SQLITE_PROFILES[profile]
+                       or settings.SQLITE_PRAGMAS)
+            # Прагмы применяются при открытии соединения, а journal_mode
+            # меняется, только пока соединение с базой одно: его и
+            # открывает основной поток до запуска читателей и писателей
+            connections.close_all()
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                connections['default'].ensure_connection()
+                try:
+                    results[profile] = runner.run_contention(
+                        readers=options['readers'],
+                        writers=options['writers'],
+                        duration=options['duration'],
+                        burst=options['burst'], seed=options['seed'],
+                    )
+                except ValueError as error:
+                    raise CommandError(error)
+                connections.close_all()
+        report = {
+            'meta': runner.metadata(
+                server='wsgi', readers=options['readers'],
+                writers=options['writers'], duration=options['duration'],
+            ),
+            'results': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(text)
+        self.stdout.write(text)
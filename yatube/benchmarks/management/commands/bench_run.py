@@ -0,0 +1,75 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность и задержки (p50/p99) '
+            'view-функций через WSGI- или ASGI-приложение.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=runner.SCENARIOS,
+            help='Сценарий; можно повторять. По умолчанию — все.'
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Через yatube.asgi в одном потоке: --concurrency — '
+                 'число одновременных запросов в цикле событий.'
+        )
+        parser.add_argument('--output', help='Куда сохранить JSON-отчёт.')
+        parser.add_argument(
+            '--compare', help='JSON-отчёт предыдущего прогона.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Допустимое ухудшение относительно --compare (доля).'
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG включён: результаты будут хуже, чем в продакшене'
+            ))
+        scenarios = options['scenario'] or runner.SCENARIOS
+        run = runner.run_asgi if options['asgi'] else runner.run_wsgi
+        try:
+            results = run(
+                scenarios, requests=options['requests'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'], seed=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        report = {
+            'meta': runner.metadata(
+                server='asgi' if options['asgi'] else 'wsgi',
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+            ),
+            'results': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(text)
+        self.stdout.write(text)
+
+        if options['compare']:
+            baseline = runner.load_report(options['compare'])['results']
+            regressions = runner.compare(
+                results, baseline, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Ухудшение производительности:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Ухудшений нет'))
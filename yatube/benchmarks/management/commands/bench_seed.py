@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.data import SCALES, generate
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу воспроизводимыми данными для нагрузочных '
+            'тестов: пользователи, сообщества, посты с картинками, '
+            'комментарии и подписки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        generate(options['scale'], seed=options['seed'],
+                 log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
@@ -0,0 +1,407 @@
+"""Прогон сценариев через WSGI- или ASGI-приложение и сравнение результатов.
+
+Запросы идут в yatube.wsgi.application (yatube.asgi.application) так же,
+как от сервера, со всеми middleware, но без сети — измеряется только
+сам Django.
+"""
+import asyncio
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.utils.crypto import get_random_string
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Адрес вне INTERNAL_IPS, чтобы не включалась debug-панель
+REMOTE_ADDR = '192.0.2.10'
+SCENARIOS = (
+    'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+    'add_comment', 'new_post',
+)
+# Прагмы SQLite для bench_contention: как у SQLite «из коробки»
+# и из настроек проекта (SQLITE_PRAGMAS)
+SQLITE_PROFILES = {
+    'default': {'journal_mode': 'delete', 'synchronous': 'full',
+                'cache_size': -2000, 'mmap_size': 0},
+    'tuned': None,
+}
+
+
+class Session:
+    """Авторизованный пользователь с cookie сессии и CSRF."""
+
+    def __init__(self, user):
+        client = Client()
+        client.force_login(user)
+        self.csrf_token = get_random_string(32)
+        self.cookie = (f'{settings.SESSION_COOKIE_NAME}='
+                       f'{client.cookies[settings.SESSION_COOKIE_NAME].value}'
+                       f'; {settings.CSRF_COOKIE_NAME}={self.csrf_token}')
+
+
+def call_wsgi(application, method, path, query='', data=None, session=None):
+    """Выполнить запрос к WSGI-приложению, вернуть HTTP-статус."""
+    body = urlencode(data or {}).encode()
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': REMOTE_ADDR,
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if session is not None:
+        environ['HTTP_COOKIE'] = session.cookie
+        environ['HTTP_X_CSRFTOKEN'] = session.csrf_token
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    result = application(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0]
+
+
+async def call_asgi(application, method, path, query='', data=None,
+                    session=None):
+    """Выполнить запрос к ASGI-приложению, вернуть HTTP-статус."""
+    body = urlencode(data or {}).encode()
+    headers = [
+        (b'host', b'localhost'),
+        (b'content-type', b'application/x-www-form-urlencoded'),
+        (b'content-length', str(len(body)).encode()),
+    ]
+    if session is not None:
+        headers += [
+            (b'cookie', session.cookie.encode()),
+            (b'x-csrftoken', session.csrf_token.encode()),
+        ]
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': (REMOTE_ADDR, 50000),
+        'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    disconnected = asyncio.Event()
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Клиент не отключается, пока приложение не ответило
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return statuses[0]
+
+
+class Fixtures:
+    """Случайные, но воспроизводимые цели запросов из текущей базы."""
+
+    def __init__(self, seed=0, sample=1000):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # Выборка делается своим генератором из упорядоченных списков:
+        # order_by('?') в SQL при одном seed даёт разные цели
+        self.post_ids = self.sample(
+            Post.objects.order_by('pk').values_list('pk', flat=True), sample
+        )
+        self.slugs = list(Group.objects.order_by('slug').values_list(
+            'slug', flat=True))
+        self.usernames = self.sample(
+            User.objects.filter(posts__isnull=False).distinct().order_by(
+                'username').values_list('username', flat=True),
+            sample,
+        )
+        reader = User.objects.filter(follower__isnull=False).first()
+        if not (self.post_ids and self.slugs and reader):
+            raise ValueError('В базе нет данных: запустите bench_seed')
+        self.session = Session(reader)
+
+    def sample(self, queryset, size):
+        items = list(queryset)
+        return self.rng.sample(items, min(size, len(items)))
+
+    def choice(self, items):
+        with self.lock:
+            return self.rng.choice(items)
+
+    def request(self, scenario):
+        """(method, path, data, session) для сценария."""
+        if scenario == 'index':
+            return 'GET', '/', None, None
+        if scenario == 'group_posts':
+            return 'GET', f'/group/{self.choice(self.slugs)}/', None, None
+        if scenario == 'profile':
+            return ('GET', f'/profile/{self.choice(self.usernames)}/',
+                    None, None)
+        if scenario == 'post_view':
+            return 'GET', f'/posts/{self.choice(self.post_ids)}/', None, None
+        if scenario == 'follow_index':
+            return 'GET', '/follow/', None, self.session
+        if scenario == 'add_comment':
+            return ('POST', f'/posts/{self.choice(self.post_ids)}/comment/',
+                    {'text': 'Комментарий из нагрузочного теста'},
+                    self.session)
+        if scenario == 'new_post':
+            return ('POST', '/create/',
+                    {'text': 'Пост из нагрузочного теста'}, self.session)
+        raise ValueError(f'Неизвестный сценарий {scenario}')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    position = min(int(round(fraction * (len(ordered) - 1))),
+                   len(ordered) - 1)
+    return ordered[position]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run_scenario(send, fixtures, scenario, requests, concurrency, warmup):
+    """Прогнать сценарий; send(method, path, data, session) -> статус."""
+    def one(_):
+        method, path, data, session = fixtures.request(scenario)
+        start = time.perf_counter()
+        status = send(method, path, data, session)
+        return time.perf_counter() - start, status >= 400
+
+    for number in range(warmup):
+        one(number)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    return _summarize_results(results, time.perf_counter() - start)
+
+
+async def arun_scenario(send, fixtures, scenario, requests, concurrency,
+                        warmup):
+    """То же, что run_scenario, для корутины send — в одном потоке."""
+    async def one():
+        method, path, data, session = fixtures.request(scenario)
+        start = time.perf_counter()
+        status = await send(method, path, data, session)
+        return time.perf_counter() - start, status >= 400
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await one()
+
+    for _ in range(warmup):
+        await one()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited() for _ in range(requests)))
+    return _summarize_results(results, time.perf_counter() - start)
+
+
+def _summarize_results(results, elapsed):
+    latencies = [latency for latency, _ in results]
+    errors = sum(failed for _, failed in results)
+    return summarize(latencies, errors, elapsed)
+
+
+def run_wsgi(scenarios, requests=200, concurrency=1, warmup=10, seed=0):
+    from yatube.wsgi import application
+
+    fixtures = Fixtures(seed=seed)
+
+    def send(method, path, data, session):
+        return call_wsgi(application, method, path, data=data,
+                         session=session)
+
+    return {
+        scenario: run_scenario(send, fixtures, scenario, requests,
+                               concurrency, warmup)
+        for scenario in scenarios
+    }
+
+
+def run_asgi(scenarios, requests=200, concurrency=1, warmup=10, seed=0):
+    from yatube.asgi import application
+
+    fixtures = Fixtures(seed=seed)
+
+    async def send(method, path, data, session):
+        return await call_asgi(application, method, path, data=data,
+                               session=session)
+
+    async def run_all():
+        return {
+            scenario: await arun_scenario(send, fixtures, scenario, requests,
+                                          concurrency, warmup)
+            for scenario in scenarios
+        }
+
+    return asyncio.run(run_all())
+
+
+def run_contention(readers=4, writers=2, duration=5.0, burst=20,
+                   pause=0.05, seed=0):
+    """
+    Чтение лент и постов под пачками add_comment.
+
+    readers потоков без перерыва запрашивают index и post_view, writers
+    потоков отправляют по burst комментариев подряд с паузой pause.
+    Возвращает сводки чтения и записи; max_ms чтения — самая долгая
+    остановка читателя за прогон.
+    """
+    from yatube.wsgi import application
+
+    fixtures = Fixtures(seed=seed)
+    stop = threading.Event()
+    reads, writes = [], []
+
+    def work(scenarios, results, size, wait):
+        try:
+            while not stop.is_set():
+                for _ in range(size):
+                    method, path, data, session = fixtures.request(
+                        fixtures.choice(scenarios)
+                    )
+                    start = time.perf_counter()
+                    status = call_wsgi(application, method, path, data=data,
+                                       session=session)
+                    results.append((time.perf_counter() - start,
+                                    status >= 400))
+                stop.wait(wait)
+        finally:
+            # Постоянные соединения потока закрываются вместе с ним
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=work,
+                         args=(('index', 'post_view'), reads, 1, 0))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=work,
+                         args=(('add_comment',), writes, burst, pause))
+        for _ in range(writers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    for name, results in (('reads', reads), ('writes', writes)):
+        if not results:
+            continue
+        latencies = [latency for latency, _ in results]
+        report[name] = summarize(
+            latencies, sum(failed for _, failed in results), elapsed
+        )
+        report[name]['max_ms'] = round(max(latencies) * 1000, 3)
+    return report
+
+
+def metadata(**extra):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'posts': Post.objects.count(),
+        **extra,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Сценарии, заметно ухудшившиеся относительно baseline.
+
+    Ухудшение — рост p50/p99 или падение пропускной способности
+    больше чем на долю threshold.
+    """
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get(scenario)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f'{scenario}: {metric} {previous[metric]} → '
+                    f'{current[metric]}'
+                )
+        if (current['throughput_rps']
+                < previous['throughput_rps'] * (1 - threshold)):
+            regressions.append(
+                f'{scenario}: throughput_rps {previous["throughput_rps"]}'
+                f' → {current["throughput_rps"]}'
+            )
+    return regressions
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report:
+        return json.load(report)
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from benchmarks import runner
+from benchmarks.data import generate
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class RunnerTest(TransactionTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_all_scenarios_run_without_errors(self):
+        """Все сценарии проходят через WSGI без ошибок."""
+        generate('smoke', log=lambda message: None)
+
+        results = runner.run_wsgi(runner.SCENARIOS, requests=3, warmup=1)
+
+        for scenario in runner.SCENARIOS:
+            with self.subTest(scenario=scenario):
+                self.assertEqual(results[scenario]['requests'], 3)
+                self.assertEqual(results[scenario]['errors'], 0)
+
+    def test_asgi_scenarios_run_without_errors(self):
+        """Все сценарии проходят через ASGI без ошибок."""
+        generate('smoke', log=lambda message: None)
+
+        results = runner.run_asgi(runner.SCENARIOS, requests=3, warmup=1)
+
+        for scenario in runner.SCENARIOS:
+            with self.subTest(scenario=scenario):
+                self.assertEqual(results[scenario]['requests'], 3)
+                self.assertEqual(results[scenario]['errors'], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'index': {'p50_ms': 10, 'p99_ms': 20,
+                              'throughput_rps': 100}}
+        current = {'index': {'p50_ms': 15, 'p99_ms': 21,
+                             'throughput_rps': 95}}
+
+        regressions = runner.compare(current, baseline, threshold=0.1)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('p50_ms', regressions[0])
+
+    def test_bench_run_requires_data(self):
+        with self.assertRaises(Exception):
+            call_command('bench_run', requests=1, stdout=StringIO())
+
+    def test_fixtures_are_reproducible(self):
+        """Один seed даёт одни и те же цели запросов."""
+        generate('smoke', log=lambda message: None)
+
+        first = runner.Fixtures(seed=1, sample=5)
+        second = runner.Fixtures(seed=1, sample=5)
+
+        self.assertEqual(first.post_ids, second.post_ids)
+        self.assertEqual(first.usernames, second.usernames)
+        self.assertEqual(
+            [first.request('post_view') for _ in range(5)],
+            [second.request('post_view') for _ in range(5)],
+        )
+
+    def test_contention_runs(self):
+        """Читатели и писатели работают одновременно."""
+        generate('smoke', log=lambda message: None)
+
+        report = runner.run_contention(readers=2, writers=1, duration=0.3,
+                                       burst=2)
+
+        # Тестовая база в памяти с общим кэшем блокирует таблицы целиком,
+        # поэтому отдельные чтения здесь могут падать — в отличие от
+        # файловой базы в режиме WAL; проверяется только сам прогон
+        for kind in ('reads', 'writes'):
+            self.assertGreater(report[kind]['requests'], 0)
+            self.assertLess(report[kind]['errors'],
+                            report[kind]['requests'])
+        self.assertGreaterEqual(report['reads']['max_ms'],
+                                report['reads']['p99_ms'])
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     name = 'core'
     verbose_name = 'Отображение ошибок'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .db import configure_sqlite
+        connection_created.connect(configure_sqlite,
+                                   dispatch_uid='core.configure_sqlite')
@@ -0,0 +1,231 @@
+"""Кэш в файле SQLite, общий для всех воркеров одной машины.
+
+У LocMemCache в каждом процессе свой кэш: фрагменты и страницы
+рендерятся в каждом воркере заново, а версии данных (posts.cache)
+у воркеров расходятся. SQLiteCache держит записи в одном файле:
+все процессы видят общие попадания и общие версии, а внешние сервисы
+вроде memcached не нужны.
+
+Лишние записи вытесняются по давности последнего чтения (LRU), числа
+хранятся как есть, поэтому incr атомарен и выполняется одним UPDATE.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+}
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+# Параметров в одном запросе — с запасом до ограничения старых SQLite
+MAX_PARAMS = 900
+
+
+def _encode(value):
+    if type(value) is float or (
+        type(value) is int and value in INTEGER_RANGE
+    ):
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return pickle.loads(value)
+    return value
+
+
+def _chunks(items):
+    for start in range(0, len(items), MAX_PARAMS):
+        yield items[start:start + MAX_PARAMS]
+
+
+class SQLiteCache(BaseCache):
+    """
+    Бэкенд кэша Django; LOCATION — путь к файлу базы.
+
+    Кроме MAX_ENTRIES и CULL_FREQUENCY в OPTIONS понимает
+    LRU_RESOLUTION: время чтения записи обновляется не чаще раза
+    в столько секунд, чтобы чтения горячих ключей не стали записями.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._lru_resolution = float(options.get('LRU_RESOLUTION', 1))
+        self._local = threading.local()
+
+    def _connection(self):
+        # Соединение своё у каждого потока и каждого процесса: после
+        # fork унаследованным соединением пользоваться нельзя
+        if getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            for name, value in PRAGMAS.items():
+                connection.execute(f'PRAGMA {name} = {value}')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _execute(self, sql, params=()):
+        return self._connection().execute(sql, params)
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _cull(self, connection, now):
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count < self._max_entries:
+            return
+        count -= connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (now,)
+        ).rowcount
+        if count < self._max_entries:
+            return
+        if not self._cull_frequency:
+            connection.execute('DELETE FROM cache')
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (count // self._cull_frequency,),
+        )
+
+    def _store(self, connection, key, value, expires, now, mode='REPLACE'):
+        return connection.execute(
+            f'INSERT OR {mode} INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            (key, _encode(value), expires, now),
+        ).rowcount
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            self._cull(connection, now)
+            return bool(self._store(
+                connection, key, value, self.get_backend_timeout(timeout),
+                now, mode='IGNORE',
+            ))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return default
+        if now - row[2] >= self._lru_resolution:
+            self._execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        return _decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        return bool(self._execute(
+            'UPDATE cache SET expires = ?, accessed = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        ).rowcount)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        ).rowcount)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(
+            'SELECT 1 FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        rows = self._execute(
+            'UPDATE cache SET value = value + ?, accessed = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?) '
+            "AND typeof(value) IN ('integer', 'real') RETURNING value",
+            (delta, now, key, now),
+        ).fetchall()
+        if not rows:
+            raise ValueError(f"Key '{key}' not found")
+        return rows[0][0]
+
+    def get_many(self, keys, version=None):
+        made = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        now = time.time()
+        found = {}
+        for chunk in _chunks(list(made)):
+            placeholders = ', '.join('?' * len(chunk))
+            for key, value in self._execute(
+                f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+                'AND (expires IS NULL OR expires > ?)',
+                (*chunk, now),
+            ):
+                found[made[key]] = _decode(value)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        with self._transaction() as connection:
+            self._cull(connection, now)
+            for key, value in data.items():
+                key = self.make_and_validate_key(key, version=version)
+                self._store(connection, key, value, expires, now)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version)
+                for key in keys]
+        for chunk in _chunks(keys):
+            placeholders = ', '.join('?' * len(chunk))
+            self._execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', chunk
+            )
+
+    def clear(self):
+        self._execute('DELETE FROM cache')
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+# Псевдоним реплики, с которой читает текущий запрос (None — основная база)
+current_replica = ContextVar('current_replica', default=None)
+
+# Cookie, после записи на время прижимающий сессию к основной базе
+PRIMARY_COOKIE = 'db_primary_until'
+
+
+class ReplicaRouter:
+    """
+    Чтение — с реплики, выбранной view (reads_from_replica), запись —
+    всегда в основную базу.
+
+    Сессии и пользователи читаются только из основной базы: иначе сразу
+    после входа или регистрации отставшая реплика «разлогинит» человека.
+    """
+
+    primary_app_labels = {'sessions', 'auth'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.primary_app_labels:
+            return 'default'
+        return current_replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от репликатора
+        return db not in settings.DATABASE_REPLICAS
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применить SQLITE_PRAGMAS к каждому новому SQLite-соединению."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_sticky(request):
+    """Была ли у сессии запись недавно, чтобы читать только своё."""
+    try:
+        until = float(request.COOKIES.get(PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def _choose_replica(request):
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas or is_sticky(request):
+        return None
+    return random.choice(replicas)
+
+
+def reads_from_replica(view):
+    """Читать в view с случайной реплики, если сессия не прижата к основной."""
+    if asyncio.iscoroutinefunction(view):
+        # Асинхронный ORM выполняет запросы в потоке, но с контекстом
+        # вызывающей корутины — выбор реплики туда переносится
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = current_replica.set(_choose_replica(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                current_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = current_replica.set(_choose_replica(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            current_replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def reading_from_primary():
+    """Читать внутри блока из основной базы, какую бы реплику ни выбрал view.
+
+    Так заполняются общие записи кэша (posts.cache): после записи версия
+    данных уже новая, а отставшая реплика отдала бы старые данные, и они
+    сохранились бы в кэше под новой версией для всех.
+    """
+    token = current_replica.set(None)
+    try:
+        yield
+    finally:
+        current_replica.reset(token)
+
+
+def writes_to_primary(view):
+    """
+    После изменяющего запроса прижать сессию к основной базе.
+
+    Изменяющие view по схеме POST/redirect/GET отвечают редиректом
+    только на выполненную запись — по нему и ставится cookie. Пока
+    реплики не догнали запись, следующие страницы читаются из основной
+    базы, и автор сразу видит свой пост, комментарий или подписку.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_from_primary():
+            response = view(request, *args, **kwargs)
+        if settings.DATABASE_REPLICAS and response.status_code in (301, 302):
+            seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                PRIMARY_COOKIE, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+    return wrapper
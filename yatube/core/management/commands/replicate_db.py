@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.replication import replicate
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную SQLite-базу в реплики из DATABASE_REPLICAS '
+            '(однократно или с интервалом).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 — скопировать один раз',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены (DATABASE_REPLICAS)')
+        while True:
+            try:
+                updated = replicate()
+            except RuntimeError as error:
+                raise CommandError(error)
+            self.stdout.write(f'Обновлены реплики: {", ".join(updated)}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
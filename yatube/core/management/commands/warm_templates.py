@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_loaders import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны и показывает время компиляции '
+            'каждого. Воркеры прогревают свой кэш шаблонов сами при '
+            'старте (TEMPLATE_WARMUP); команда проверяет шаблоны '
+            'перед выкладкой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько самых медленных шаблонов показать.')
+
+    def handle(self, *args, **options):
+        timings, errors = warm_templates()
+        slowest = sorted(timings.items(), key=lambda item: item[1],
+                         reverse=True)
+        for name, seconds in slowest[:options['top']]:
+            self.stdout.write(f'{seconds * 1000:8.2f} мс  {name}')
+        self.stdout.write(
+            f'Скомпилировано шаблонов: {len(timings)} '
+            f'за {sum(timings.values()) * 1000:.1f} мс'
+        )
+        if errors:
+            raise CommandError('Шаблоны с ошибками:\n' + '\n'.join(
+                f'{name}: {error}' for name, error in sorted(errors.items())
+            ))
@@ -0,0 +1,145 @@
+"""Метрики запросов: число SQL-запросов, время БД, рендера и ответа.
+
+Метрики копятся в памяти процесса (у каждого воркера свои) и отдаются
+в текстовом формате Prometheus view-функцией core.views.metrics.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+current_request = contextvars.ContextVar('current_request', default=None)
+
+
+class RequestMetrics:
+    """Метрики одного запроса; доступны как response.metrics."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.templates = defaultdict(float)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def record_render(seconds):
+    """Время рендера шаблона верхнего уровня — во время запроса.
+
+    Время по отдельным шаблонам, включая вложенные, считает загрузчик
+    core.template_loaders.Loader.
+    """
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.render_time += seconds
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.queries = defaultdict(int)
+            self.db_time = defaultdict(float)
+            self.render_time = defaultdict(float)
+            self.budget_exceeded = defaultdict(int)
+            self.latency_buckets = defaultdict(lambda: [0] * len(BUCKETS))
+            self.latency_sum = defaultdict(float)
+            self.latency_count = defaultdict(int)
+            self.templates = defaultdict(float)
+            self.templates_count = defaultdict(int)
+            self.counters = defaultdict(int)
+
+    def observe_request(self, view, status, metrics, budget_exceeded):
+        with self._lock:
+            self.requests[(view, status)] += 1
+            self.queries[view] += metrics.queries
+            self.db_time[view] += metrics.db_time
+            self.render_time[view] += metrics.render_time
+            if budget_exceeded:
+                self.budget_exceeded[view] += 1
+            buckets = self.latency_buckets[view]
+            for position, bound in enumerate(BUCKETS):
+                if metrics.total_time <= bound:
+                    buckets[position] += 1
+            self.latency_sum[view] += metrics.total_time
+            self.latency_count[view] += 1
+
+    def observe_render(self, template_name, seconds):
+        with self._lock:
+            self.templates[template_name] += seconds
+            self.templates_count[template_name] += 1
+
+    def increment(self, name, amount=1, **labels):
+        """Произвольный счётчик, например попаданий в кэш."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += amount
+
+    def render(self):
+        with self._lock:
+            return '\n'.join(self._lines()) + '\n'
+
+    def _lines(self):
+        yield '# HELP yatube_requests_total Обработано запросов.'
+        yield '# TYPE yatube_requests_total counter'
+        for (view, status), value in sorted(self.requests.items()):
+            yield (f'yatube_requests_total{{view="{view}",'
+                   f'status="{status}"}} {value}')
+
+        per_view = (
+            ('yatube_db_queries_total', 'counter', 'SQL-запросов.',
+             self.queries),
+            ('yatube_db_seconds_total', 'counter', 'Время в БД.',
+             self.db_time),
+            ('yatube_render_seconds_total', 'counter', 'Время рендера.',
+             self.render_time),
+            ('yatube_query_budget_exceeded_total', 'counter',
+             'Превышений бюджета SQL-запросов.', self.budget_exceeded),
+        )
+        for name, kind, help_text, values in per_view:
+            yield f'# HELP {name} {help_text}'
+            yield f'# TYPE {name} {kind}'
+            for view, value in sorted(values.items()):
+                yield f'{name}{{view="{view}"}} {value:g}'
+
+        name = 'yatube_request_duration_seconds'
+        yield f'# HELP {name} Полное время ответа.'
+        yield f'# TYPE {name} histogram'
+        for view, buckets in sorted(self.latency_buckets.items()):
+            for bound, value in zip(BUCKETS, buckets):
+                yield f'{name}_bucket{{view="{view}",le="{bound}"}} {value}'
+            count = self.latency_count[view]
+            yield f'{name}_bucket{{view="{view}",le="+Inf"}} {count}'
+            yield f'{name}_sum{{view="{view}"}} {self.latency_sum[view]:g}'
+            yield f'{name}_count{{view="{view}"}} {count}'
+
+        yield '# HELP yatube_template_render_seconds_total Рендер шаблонов.'
+        yield '# TYPE yatube_template_render_seconds_total counter'
+        for template_name, value in sorted(self.templates.items()):
+            yield (f'yatube_template_render_seconds_total'
+                   f'{{template="{template_name}"}} {value:g}')
+        yield '# TYPE yatube_template_renders_total counter'
+        for template_name, value in sorted(self.templates_count.items()):
+            yield (f'yatube_template_renders_total'
+                   f'{{template="{template_name}"}} {value}')
+
+        for (name, labels), value in sorted(self.counters.items()):
+            label_text = ','.join(f'{key}="{label}"'
+                                  for key, label in labels)
+            yield f'yatube_{name}_total{{{label_text}}} {value:g}'
+
+
+registry = Registry()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import RequestMetrics, current_request, registry
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Считает SQL-запросы, время БД, рендера и ответа для каждой view.
+
+    Превышение бюджета запросов из QUERY_BUDGETS пишется в лог
+    и в метрику yatube_query_budget_exceeded_total. Работает и под
+    ASGI, не заставляя асинхронные view выполняться в потоке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django распознаёт асинхронный middleware
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        # Соединения принадлежат потоку, в котором асинхронный ORM
+        # выполняет запросы этого запроса, — там и ставится обёртка
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, metrics)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            current_request.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    def _finish(self, request, response, metrics, start):
+        metrics.total_time = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        budget = settings.QUERY_BUDGETS.get(view)
+        exceeded = budget is not None and metrics.queries > budget
+        if exceeded:
+            logger.warning('%s: %s SQL-запросов при бюджете %s',
+                           view, metrics.queries, budget)
+        registry.observe_request(
+            view, response.status_code, metrics, exceeded
+        )
+        response.metrics = metrics
+        return response
+
+
+def _wrap_connections(stack, metrics):
+    for connection in connections.all():
+        stack.enter_context(
+            connection.execute_wrapper(metrics.execute_wrapper)
+        )
@@ -0,0 +1,46 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+
+
+def copy_database(source, target, pages=-1):
+    """
+    Скопировать SQLite-базу source в target через backup API.
+
+    Копия согласованна: читатели target видят либо старое, либо новое
+    состояние целиком. source и target — пути или открытые соединения.
+    """
+    source_connection = _connect(source)
+    target_connection = _connect(target)
+    try:
+        source_connection.backup(target_connection, pages=pages)
+    finally:
+        if source_connection is not source:
+            source_connection.close()
+        if target_connection is not target:
+            target_connection.close()
+
+
+def _connect(database):
+    if isinstance(database, sqlite3.Connection):
+        return database
+    return sqlite3.connect(database)
+
+
+def replicate(replicas=None):
+    """
+    Обновить реплики из основной базы — замена настоящей репликации
+    для разработки и тестов. Возвращает список обновлённых псевдонимов.
+    """
+    primary = connections['default']
+    if primary.vendor != 'sqlite':
+        raise RuntimeError('Репликатор работает только с SQLite')
+    updated = []
+    for alias in replicas or settings.DATABASE_REPLICAS:
+        copy_database(
+            primary.settings_dict['NAME'],
+            connections[alias].settings_dict['NAME'],
+        )
+        updated.append(alias)
+    return updated
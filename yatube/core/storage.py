@@ -0,0 +1,63 @@
+"""Хранилище статики: имена с хэшем содержимого и сжатые копии файлов.
+
+collectstatic кладёт в STATIC_ROOT файлы вида yatube.3f2a9c.css, а рядом
+с текстовыми — .gz и, если установлен brotli, .br. Такие файлы никогда
+не меняются, поэтому отдаются с кэшем на год (core.views.static).
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.xml', '.json', '.html',
+)
+# Выигрыш на файлах меньше этого размера не окупает лишний файл
+MIN_COMPRESS_SIZE = 256
+
+
+def compress(path):
+    """Записать path.gz и path.br, если они меньше исходного файла."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(data):
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        # Статика ещё не собрана (разработка, тесты) — ссылки без хэша;
+        # после collectstatic отсутствующий в манифесте файл — ошибка
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def is_immutable(self, name):
+        """Имя с хэшем содержимого из манифеста."""
+        if not hasattr(self, '_hashed_names'):
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return name in self._hashed_names
@@ -0,0 +1,83 @@
+"""Кэш скомпилированных шаблонов, его прогрев и замер рендера."""
+import logging
+import os
+import time
+
+from django.template import (TemplateDoesNotExist, TemplateSyntaxError,
+                             engines)
+from django.template.loaders import cached
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+class Loader(cached.Loader):
+    """
+    Кэширующий загрузчик, который замеряет рендер каждого шаблона.
+
+    Замер ставится на скомпилированный шаблон один раз, поэтому
+    учитываются и шаблоны из include и extends. Время шаблона
+    включает время вложенных в него шаблонов.
+    """
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if '_render' not in vars(template):
+            template._render = _timed_render(template)
+        return template
+
+
+def _timed_render(template):
+    def render(context):
+        start = time.perf_counter()
+        try:
+            # Метод класса ищется при каждом вызове: тестовое окружение
+            # Django подменяет Template._render своим
+            return type(template)._render(template, context)
+        finally:
+            registry.observe_render(template.origin.template_name,
+                                    time.perf_counter() - start)
+    return render
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах загрузчиков движка."""
+    names = {}
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for name in sorted(files):
+                        if not name.endswith(TEMPLATE_EXTENSIONS):
+                            continue
+                        path = os.path.relpath(os.path.join(root, name),
+                                               directory)
+                        names.setdefault(path.replace(os.sep, '/'), None)
+    return list(names)
+
+
+def warm_templates():
+    """
+    Скомпилировать все шаблоны в кэш загрузчика текущего процесса.
+
+    Возвращает время компиляции по шаблонам и ошибки по шаблонам,
+    которые не компилируются (они же пишутся в лог).
+    """
+    timings, errors = {}, {}
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            start = time.perf_counter()
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                errors[name] = str(error)
+                logger.warning('Шаблон %s не компилируется: %s', name, error)
+                continue
+            timings[name] = time.perf_counter() - start
+    return timings, errors
@@ -0,0 +1,43 @@
+import copy
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def isolated_caches():
+    """
+    Файловые кэши (core.cache.SQLiteCache) во временном каталоге.
+
+    cache.clear() в тестах не стирает кэш разработчика, а одновременные
+    прогоны не делят записи. Используется и manage.py test (TestRunner),
+    и pytest (tests/conftest.py), который TEST_RUNNER не читает.
+    """
+    cache_dir = tempfile.mkdtemp(prefix='yatube-cache-')
+    caches = copy.deepcopy(settings.CACHES)
+    for alias, params in caches.items():
+        if params['BACKEND'] == 'core.cache.SQLiteCache':
+            params['LOCATION'] = os.path.join(cache_dir, f'{alias}.sqlite3')
+    try:
+        with override_settings(CACHES=caches):
+            yield cache_dir
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """Запуск тестов со своим кэшем (isolated_caches)."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.caches = isolated_caches()
+        self.caches.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
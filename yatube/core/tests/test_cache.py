@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+from posts.cache import make_key
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_instances_share_entries(self):
+        """Запись, сделанная одним экземпляром, видна другому."""
+        self.cache.set('answer', {'value': 42})
+        self.assertEqual(self.make_cache().get('answer'), {'value': 42})
+
+    def test_expired_entries_are_missing(self):
+        """Просроченная запись не читается, и add может её заменить."""
+        self.cache.set('key', 'old', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertNotIn('key', self.cache)
+        self.assertTrue(self.cache.add('key', 'new'))
+        self.assertFalse(self.cache.add('key', 'newer'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_many(self):
+        """get_many и delete_many работают с пачками ключей."""
+        self.cache.set_many({f'key-{number}': number
+                             for number in range(1000)})
+        found = self.cache.get_many(['key-1', 'key-999', 'missing'])
+        self.assertEqual(found, {'key-1': 1, 'key-999': 999})
+        self.cache.delete_many([f'key-{number}' for number in range(1000)])
+        self.assertEqual(self.cache.get_many(['key-1']), {})
+
+    def test_incr_is_atomic(self):
+        """Одновременные incr из разных потоков не теряют приращений."""
+        self.cache.set('counter', 0)
+
+        def work():
+            cache = self.make_cache()
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_read_entries_are_culled(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        cache = self.make_cache(MAX_ENTRIES=4, CULL_FREQUENCY=2,
+                                LRU_RESOLUTION=0)
+        for number in range(4):
+            cache.set(f'key-{number}', number)
+        cache.get('key-0')
+        cache.get('key-1')
+
+        cache.set('key-4', 4)
+
+        self.assertEqual(
+            sorted(cache.get_many([f'key-{n}' for n in range(5)])),
+            ['key-0', 'key-1', 'key-4'],
+        )
+
+
+class MakeKeyTest(SimpleTestCase):
+    def test_keys(self):
+        """Ключи posts читаемы, а длинные и с пробелами — хэшируются."""
+        self.assertEqual(make_key('version', 'feed'), 'posts:version:feed')
+        hashed = make_key('count', 'SELECT * FROM posts_post')
+        self.assertRegex(hashed, r'^posts:count:[0-9a-f]{32}$')
+        self.assertRegex(make_key('page', 'x' * 300),
+                         r'^posts:page:[0-9a-f]{32}$')
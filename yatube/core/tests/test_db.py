@@ -0,0 +1,154 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.db import connections
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+
+from core.db import (PRIMARY_COOKIE, ReplicaRouter, configure_sqlite,
+                     reads_from_replica, writes_to_primary)
+from core.replication import copy_database
+from posts.cache import get_or_compute
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'],
+                   DATABASE_REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.used = {}
+
+        def view(request):
+            self.used['post'] = self.router.db_for_read(Post)
+            self.used['user'] = self.router.db_for_read(User)
+            return HttpResponse()
+        self.view = view
+
+    def test_reads_from_replica(self):
+        """Посты в читающей view читаются с реплики, пользователи — нет."""
+        reads_from_replica(self.view)(self.factory.get('/'))
+        self.assertEqual(self.used, {'post': 'replica', 'user': 'default'})
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_cache_is_filled_from_primary(self):
+        """Промах общего кэша читается из основной базы, а не с реплики."""
+        cache.clear()
+
+        def view(request):
+            self.used['page'] = get_or_compute(
+                'page', lambda: self.router.db_for_read(Post), 60
+            )
+            self.used['post'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        reads_from_replica(view)(self.factory.get('/'))
+
+        self.assertEqual(self.used, {'page': 'default', 'post': 'replica'})
+
+    def test_writes_go_to_primary(self):
+        """Запись всегда идёт в основную базу."""
+        reads_from_replica(self.view)(self.factory.get('/'))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_write_makes_session_sticky(self):
+        """После записи сессия читает из основной базы."""
+        response = writes_to_primary(
+            lambda request: HttpResponseRedirect('/')
+        )(self.factory.post('/'))
+        cookie = response.cookies[PRIMARY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_COOKIE] = cookie.value
+        reads_from_replica(self.view)(request)
+        self.assertEqual(self.used['post'], 'default')
+
+    def test_stickiness_expires(self):
+        """Просроченная или испорченная cookie не прижимает сессию."""
+        for value in (str(time.time() - 1), 'мусор'):
+            request = self.factory.get('/')
+            request.COOKIES[PRIMARY_COOKIE] = value
+            reads_from_replica(self.view)(request)
+            self.assertEqual(self.used['post'], 'replica')
+
+    def test_failed_write_is_not_sticky(self):
+        """Ответ без редиректа (ошибка формы) cookie не ставит."""
+        response = writes_to_primary(self.view)(self.factory.post('/'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик всё читается из основной базы."""
+        reads_from_replica(self.view)(self.factory.get('/'))
+        self.assertEqual(self.used['post'], 'default')
+        response = writes_to_primary(
+            lambda request: HttpResponseRedirect('/')
+        )(self.factory.post('/'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+
+class CopyDatabaseTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.primary = os.path.join(directory, 'primary.sqlite3')
+        self.replica = os.path.join(directory, 'replica.sqlite3')
+
+    def write(self, *statements):
+        with sqlite3.connect(self.primary) as connection:
+            for statement in statements:
+                connection.execute(statement)
+        connection.close()
+
+    def read_replica(self):
+        connection = sqlite3.connect(self.replica)
+        try:
+            return [row[0] for row in
+                    connection.execute('SELECT text FROM post ORDER BY id')]
+        finally:
+            connection.close()
+
+    def test_replica_follows_primary(self):
+        """Реплика после копирования видит схему и новые записи."""
+        self.write('CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)',
+                   "INSERT INTO post (text) VALUES ('первый')")
+        copy_database(self.primary, self.replica)
+        self.assertEqual(self.read_replica(), ['первый'])
+
+        self.write("INSERT INTO post (text) VALUES ('второй')")
+        self.assertEqual(self.read_replica(), ['первый'])
+        copy_database(self.primary, self.replica)
+        self.assertEqual(self.read_replica(), ['первый', 'второй'])
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        """Прагмы из SQLITE_PRAGMAS применяются к новому соединению."""
+        connection = connections['default']
+        pragmas = {'busy_timeout': 1234, 'cache_size': -4096}
+        with connection.cursor() as cursor:
+            previous = {}
+            for name in pragmas:
+                cursor.execute(f'PRAGMA {name}')
+                previous[name] = cursor.fetchone()[0]
+
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                configure_sqlite(sender=None, connection=connection)
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}')
+                self.assertEqual(cursor.fetchone()[0], value)
+
+            with override_settings(SQLITE_PRAGMAS=previous):
+                configure_sqlite(sender=None, connection=connection)
@@ -0,0 +1,70 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.views import serve_static
+
+
+class StaticBundleTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Каталог создаётся при запуске тестов, а не при импорте модуля,
+        # и во временном каталоге системы, а не в дереве проекта
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root,
+                            ignore_errors=True)
+        static_root = override_settings(STATIC_ROOT=cls.static_root)
+        static_root.enable()
+        cls.addClassCleanup(static_root.disable)
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_pages_have_no_inline_styles(self):
+        """Стили подключаются файлом с хэшем, а не блоками <style>."""
+        response = self.client.get(reverse('posts:index'))
+        content = response.content.decode()
+        self.assertNotIn('<style>', content)
+        self.assertIn(staticfiles_storage.url('css/yatube.css'), content)
+        self.assertRegex(staticfiles_storage.url('css/yatube.css'),
+                         r'/static/css/yatube\.[0-9a-f]{12}\.css$')
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        url = staticfiles_storage.url('css/yatube.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        path = os.path.join(self.static_root, 'css', 'yatube.css')
+        with open(path, 'rb') as original:
+            self.assertEqual(
+                gzip.decompress(b''.join(response.streaming_content)),
+                original.read(),
+            )
+
+    def test_plain_name_is_revalidated(self):
+        """Файл без хэша отдаётся как есть и перепроверяется браузером."""
+        response = self.client.get('/static/css/yatube.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+        response = self.client.get(
+            '/static/css/yatube.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        request = RequestFactory().get('/')
+        for path in ('css/missing.css', '../settings.py'):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    serve_static(request, path)
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase
+from django.urls import reverse
+
+from core.metrics import registry
+from core.template_loaders import template_names, warm_templates
+from posts.models import Post
+
+User = get_user_model()
+
+
+def cached_loader():
+    engine = next(backend.engine for backend in engines.all()
+                  if hasattr(backend, 'engine'))
+    return engine, engine.template_loaders[0]
+
+
+class TemplateWarmupTest(TestCase):
+    def test_all_templates_compiled(self):
+        """Прогрев кладёт в кэш все шаблоны, включая include."""
+        engine, loader = cached_loader()
+        loader.reset()
+
+        timings, errors = warm_templates()
+
+        self.assertEqual(errors, {})
+        names = template_names(engine)
+        for name in ('index.html', 'includes/post_card.html',
+                     'includes/paginator.html', 'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+                self.assertIn(name, timings)
+                self.assertIn(name, loader.get_template_cache)
+
+    def test_renders_measured_per_template(self):
+        """Время рендера считается и для подключённых шаблонов."""
+        author = User.objects.create_user('anna')
+        Post.objects.create(text='Текст', author=author)
+        cache.clear()
+        registry.reset()
+
+        self.client.get(reverse('posts:index'))
+
+        for name in ('index.html', 'base.html', 'includes/switcher.html',
+                     'includes/posts_list.html', 'includes/paginator.html'):
+            with self.subTest(name=name):
+                self.assertGreater(registry.templates_count[name], 0)
+
+    def test_warm_templates_command(self):
+        output = StringIO()
+        call_command('warm_templates', top=3, stdout=output)
+        self.assertIn('Скомпилировано шаблонов', output.getvalue())
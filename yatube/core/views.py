@@ -1,4 +1,19 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -17,3 +32,79 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def _metrics_allowed(request):
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return False
+    if not settings.METRICS_TOKEN:
+        return True
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', ''
+    ).partition(' ')
+    return scheme.lower() == 'bearer' and constant_time_compare(
+        token.strip(), settings.METRICS_TOKEN
+    )
+
+
+def metrics(request):
+    """
+    Метрики для Prometheus: с адресов METRICS_ALLOWED_IPS и, если задан
+    METRICS_TOKEN, только с этим токеном в заголовке Authorization.
+    """
+    if not _metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+# Кодировки в порядке предпочтения и расширения их копий (core.storage)
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def serve_static(request, path):
+    """
+    Файл из STATIC_ROOT, сжатый заранее, если клиент это принимает.
+
+    Файлы с хэшем содержимого в имени кэшируются на год, остальные
+    браузер перепроверяет по Last-Modified.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+
+    modified = os.stat(full_path).st_mtime
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), modified
+    ):
+        return HttpResponseNotModified()
+
+    accepted = {
+        token.split(';')[0].strip()
+        for token in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    served_path, encoding = full_path, None
+    for name, suffix in STATIC_ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            served_path, encoding = full_path + suffix, name
+            break
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        open(served_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(modified)
+    if staticfiles_storage.is_immutable(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -1,10 +1,10 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Post, UserStats
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'pk', 'author')
+    list_display = ('text', 'pub_date', 'pk', 'author', 'comments_count')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -19,3 +19,4 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow)
+admin.site.register(UserStats)
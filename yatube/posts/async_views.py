@@ -0,0 +1,124 @@
+"""Асинхронные версии читающих view для ASGI (yatube.asgi).
+
+Данные читаются асинхронным ORM, пока соединение ждёт базу, воркер
+обслуживает других клиентов. Шаблоны рендерятся в потоке: теги
+миниатюр и контекстные процессоры обращаются к базе синхронно.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from core.db import reads_from_replica
+
+from .cache import cached_page, conditional_page, feed_cache_context
+from .forms import CommentForm
+from .models import Group, Post
+from . import timelines
+from .utils import aadd_context_to_post_and_profile, aget_page_obj
+
+User = get_user_model()
+
+arender = sync_to_async(render)
+
+
+async def _get_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'{queryset.model._meta.object_name} не найден')
+
+
+@reads_from_replica
+@conditional_page('feed')
+@cached_page('feed')
+async def index(request):
+    posts_list = Post.objects.select_related('author', 'group').all()
+    page_obj = await aget_page_obj(request, posts_list)
+
+    context = {'page_obj': page_obj, **feed_cache_context()}
+
+    return await arender(request, 'index.html', context)
+
+
+@reads_from_replica
+@conditional_page('feed')
+@cached_page('feed')
+async def group_posts(request, slug):
+    group = await _get_or_404(Group.objects.all(), slug=slug)
+    group_posts_list = group.posts.select_related('author', 'group').all()
+    page_obj = await aget_page_obj(request, group_posts_list)
+
+    context = {'group': group, 'page_obj': page_obj, **feed_cache_context()}
+
+    return await arender(request, 'group_list.html', context)
+
+
+@reads_from_replica
+@conditional_page('feed', 'follow')
+@cached_page('feed', 'follow')
+async def profile(request, username):
+    a_user = await _get_or_404(User.objects.all(), username=username)
+
+    a_users_posts = a_user.posts.select_related('author', 'group').all()
+    page = await aget_page_obj(request, a_users_posts)
+
+    context = {
+        'a_user': a_user,
+        'page_obj': page,
+        'profile_view': True,
+    }
+
+    await aadd_context_to_post_and_profile(request, a_user, context)
+
+    return await arender(request, 'profile.html', context)
+
+
+@reads_from_replica
+@conditional_page('feed', 'follow')
+@cached_page('feed', 'follow')
+async def post_view(request, post_id):
+    a_post = await _get_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
+    a_user = a_post.author
+
+    comments = [
+        comment async for comment in
+        a_post.comments.select_related('author').all()
+    ]
+
+    context = {
+        'a_post': a_post,
+        'post_view': True,
+        'form': CommentForm(),
+        'comments': comments,
+        'post_id': post_id,
+        'a_user': a_user,
+    }
+
+    await aadd_context_to_post_and_profile(request, a_user, context)
+
+    return await arender(request, 'post.html', context)
+
+
+@reads_from_replica
+async def follow_index(request):
+    # login_required в Django 4.1 не умеет async view, а request.user
+    # загружается из сессии синхронно
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return redirect_to_login(request.get_full_path(),
+                                 settings.LOGIN_URL)
+
+    followed_posts_list = (
+        await timelines.atimeline_posts(request.user)
+    ).select_related('author', 'group')
+    page_obj = await aget_page_obj(
+        request, followed_posts_list, ordering=timelines.ORDERING
+    )
+
+    context = {'page_obj': page_obj}
+
+    return await arender(request, 'posts/follow.html', context)
@@ -0,0 +1,420 @@
+import asyncio
+import copy
+import hashlib
+import json
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from core.db import reading_from_primary
+from core.metrics import registry
+
+from . import holes
+
+# Длиннее ключ не примут memcached и проверки Django (CacheKeyWarning)
+MAX_KEY_LENGTH = 200
+# Как часто ждущий запрос проверяет, не готово ли значение
+LOCK_POLL_INTERVAL = 0.05
+# Заглушки, показанные при вычислении текущей записи (см. placeholder_shown)
+_placeholders = ContextVar('cache_placeholders', default=None)
+
+
+def make_key(kind, *parts):
+    """Ключ записи кэша приложения: posts:<kind>:<части через «:»>.
+
+    Все ключи posts строятся здесь, поэтому одинаковы во всех воркерах,
+    которые делят кэш. Слишком длинный ключ или ключ с пробелами
+    и служебными символами заменяется хэшем частей.
+    """
+    key = ':'.join(['posts', kind, *map(str, parts)])
+    if len(key) > MAX_KEY_LENGTH or not key.isascii() or not all(
+        char.isprintable() and not char.isspace() for char in key
+    ):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        key = f'posts:{kind}:{digest}'
+    return key
+
+
+def get_version(scope):
+    """Текущая версия данных области scope (например, 'feed').
+
+    Версия — момент последнего изменения. Её включают в ключи кэша,
+    поэтому после изменения данных старые записи просто перестают
+    читаться и со временем вытесняются. Если ключ версии пропал из кэша,
+    версия начинается заново с текущего момента — это тоже сбрасывает
+    все зависящие от неё записи.
+    """
+    key = make_key('version', scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+def touch_version(scope):
+    cache.set(make_key('version', scope), time.time(), None)
+
+
+def feed_cache_context():
+    """Переменные для {% cache %} вокруг списков постов."""
+    return {
+        'feed_version': get_version('feed'),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+    }
+
+
+def conditional_page(*scopes):
+    """Декоратор view: ETag и Last-Modified по версиям областей scopes.
+
+    Версии лежат в кэше, поэтому проверка свежести не трогает базу,
+    а на совпавший If-None-Match / If-Modified-Since view вообще
+    не вызывается — клиент получает 304. В ETag входят пользователь
+    (от него зависят навигация и кнопки) и адрес вместе с GET-параметрами.
+
+    Асинхронные view оборачиваются так же: condition() из Django их
+    не поддерживает.
+    """
+    def etag(request, *args, **kwargs):
+        raw = json.dumps([
+            [get_version(scope) for scope in scopes],
+            request.user.pk,
+            request.get_full_path(),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        # HTTP-даты с точностью до секунды: пока секунда изменения
+        # не кончилась, в неё может попасть ещё одно, и клиент
+        # с If-Modified-Since получил бы устаревший 304. Тогда
+        # Last-Modified не отдаётся, свежесть проверяется по ETag
+        second = math.floor(max(get_version(scope) for scope in scopes)) + 1
+        if time.time() < second:
+            return None
+        return datetime.fromtimestamp(second, tz=timezone.utc)
+
+    def decorator(view):
+        if not asyncio.iscoroutinefunction(view):
+            return condition(
+                etag_func=etag, last_modified_func=last_modified
+            )(view)
+        return _aconditional(view, etag, last_modified)
+    return decorator
+
+
+def _aconditional(view, etag, last_modified):
+    """condition() из Django для асинхронного view."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        # request.user ленивый и загружается из базы синхронно
+        await sync_to_async(lambda: request.user.pk)()
+        res_etag = quote_etag(etag(request))
+        res_last_modified = last_modified(request)
+        if res_last_modified is not None:
+            res_last_modified = int(res_last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=res_etag, last_modified=res_last_modified,
+        )
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            if res_last_modified and not response.has_header(
+                'Last-Modified'
+            ):
+                response.headers['Last-Modified'] = http_date(
+                    res_last_modified
+                )
+            response.headers.setdefault('ETag', res_etag)
+        return response
+    return inner
+
+
+def _fresh(entry, now):
+    """Свежа ли запись с учётом раннего истечения (XFetch).
+
+    Запись пересчитывается заранее с вероятностью, которая растёт
+    к концу её срока и со временем её вычисления (delta): дорогие
+    записи обновляет один ранний запрос, а не все разом в момент
+    истечения.
+    """
+    early = (entry['delta'] * settings.CACHE_XFETCH_BETA
+             * -math.log(1 - random.random()))
+    return now + early < entry['expires']
+
+
+def _observe(name, result):
+    registry.increment('cache_requests', cache=name, result=result)
+
+
+def placeholder_shown():
+    """Отметить, что вычисляемая запись показывает заглушку.
+
+    Например, вместо миниатюры, которую ещё создают в фоне. Такая
+    запись и все, что её включают, живут в кэше не дольше
+    THUMBNAIL_PLACEHOLDER_TIMEOUT: когда заглушку есть чем заменить,
+    сбрасывать остальные записи не нужно.
+    """
+    shown = _placeholders.get()
+    if shown is not None:
+        shown.append(True)
+
+
+def placeholders_pending():
+    """Показаны ли заглушки при вычислении текущей записи."""
+    return bool(_placeholders.get())
+
+
+@contextmanager
+def _tracking_placeholders():
+    outer = _placeholders.get()
+    shown = []
+    token = _placeholders.set(shown)
+    try:
+        yield shown
+    finally:
+        _placeholders.reset(token)
+        # Фрагмент с заглушкой делает временной и страницу вокруг него
+        if shown and outer is not None:
+            outer.extend(shown)
+
+
+def _entry(value, delta, timeout, placeholders=False):
+    if placeholders:
+        timeout = min(timeout or math.inf,
+                      settings.THUMBNAIL_PLACEHOLDER_TIMEOUT)
+    if timeout is None:
+        return {'value': value, 'delta': delta, 'expires': math.inf}, None
+    entry = {'value': value, 'delta': delta, 'expires': time.time() + timeout}
+    # Ещё CACHE_STALE_SECONDS запись можно отдавать, пока её пересчитывают
+    return entry, timeout + settings.CACHE_STALE_SECONDS
+
+
+def _compute(key, compute, timeout):
+    start = time.perf_counter()
+    with _tracking_placeholders() as shown, reading_from_primary():
+        value = compute()
+    if value is not None:
+        cache.set(key, *_entry(
+            value, time.perf_counter() - start, timeout, bool(shown)
+        ))
+    return value
+
+
+async def _acompute(key, compute, timeout):
+    start = time.perf_counter()
+    with _tracking_placeholders() as shown, reading_from_primary():
+        value = await compute()
+    if value is not None:
+        await cache.aset(key, *_entry(
+            value, time.perf_counter() - start, timeout, bool(shown)
+        ))
+    return value
+
+
+def get_or_compute(key, compute, timeout, name='default'):
+    """Значение из кэша или compute() — без «паники» на промахе.
+
+    Пересчитывает значение только тот запрос, что взял блокировку.
+    Остальные, пока идёт пересчёт, получают устаревшую запись
+    (stale-while-revalidate), а если записи нет совсем — ждут её,
+    не дольше CACHE_LOCK_TIMEOUT. None из compute не кэшируется,
+    а сам compute читает из основной базы, а не с реплики.
+    В метрику cache_requests попадают hit, miss, refresh (пересчёт
+    устаревшей или рано истёкшей записи), stale и coalesced (ожидание
+    чужого пересчёта).
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry, time.time()):
+        _observe(name, 'hit')
+        return entry['value']
+    lock = make_key('lock', key)
+    if cache.add(lock, 1, settings.CACHE_LOCK_TIMEOUT):
+        _observe(name, 'miss' if entry is None else 'refresh')
+        try:
+            return _compute(key, compute, timeout)
+        finally:
+            cache.delete(lock)
+    if entry is not None:
+        _observe(name, 'stale')
+        return entry['value']
+    _observe(name, 'coalesced')
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+        if cache.get(lock) is None:
+            break
+    # Пересчёт не удался или не кэшируется — считаем сами
+    return _compute(key, compute, timeout)
+
+
+async def aget_or_compute(key, compute, timeout, name='default'):
+    """То же, что get_or_compute, для асинхронной функции compute."""
+    entry = await cache.aget(key)
+    if entry is not None and _fresh(entry, time.time()):
+        _observe(name, 'hit')
+        return entry['value']
+    lock = make_key('lock', key)
+    if await cache.aadd(lock, 1, settings.CACHE_LOCK_TIMEOUT):
+        _observe(name, 'miss' if entry is None else 'refresh')
+        try:
+            return await _acompute(key, compute, timeout)
+        finally:
+            await cache.adelete(lock)
+    if entry is not None:
+        _observe(name, 'stale')
+        return entry['value']
+    _observe(name, 'coalesced')
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry['value']
+        if await cache.aget(lock) is None:
+            break
+    return await _acompute(key, compute, timeout)
+
+
+def page_cache_key(request, scopes):
+    versions = '-'.join(str(get_version(scope)) for scope in scopes)
+    return make_key('page', versions, request.get_full_path())
+
+
+def _cacheable(request):
+    return request.method in ('GET', 'HEAD')
+
+
+def _page_entry(request, response):
+    """Запись кэша: страница с метками и она же для анонимов."""
+    content = response.content.decode(response.charset)
+    anonymous = copy.copy(request)
+    anonymous.user = AnonymousUser()
+    return {
+        'content': content,
+        'anonymous': holes.fill_holes(content, anonymous),
+        'content_type': response['Content-Type'],
+        'placeholders': placeholders_pending(),
+    }
+
+
+def _store(response):
+    return (response.status_code == 200 and not response.streaming
+            and not response.cookies)
+
+
+def _no_store(response, placeholders):
+    # Иначе браузер получит 304 на страницу с заглушками: версии
+    # данных при готовности миниатюр не меняются
+    if placeholders:
+        patch_cache_control(response, no_store=True)
+    return response
+
+
+def _from_entry(request, entry):
+    if request.user.is_authenticated:
+        content = holes.fill_holes(entry['content'], request)
+    else:
+        content = entry['anonymous']
+    return _no_store(
+        HttpResponse(content, content_type=entry['content_type']),
+        entry.get('placeholders'),
+    )
+
+
+def _fill_response(request, response, placeholders):
+    if not response.streaming:
+        response.content = holes.fill_holes(
+            response.content.decode(response.charset), request
+        )
+    return _no_store(response, placeholders)
+
+
+def _punch(view, request, *args, **kwargs):
+    token = holes.punching.set(True)
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        holes.punching.reset(token)
+
+
+def cached_page(*scopes):
+    """Декоратор view: кэш всей страницы с инвалидацией по версиям scopes.
+
+    Страница рендерится один раз на версию данных, без фрагментов,
+    зависящих от пользователя, — на их месте метки {% hole %}.
+    Анонимам отдаётся заранее заполненная копия без рендеринга шаблонов,
+    вошедшим пользователям дорисовываются только фрагменты. Одновременные
+    промахи по одной странице рендерит один запрос (get_or_compute).
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            return _acached_page(view, scopes)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+            rendered = []
+
+            def compute():
+                response = _punch(view, request, *args, **kwargs)
+                rendered.append((response, placeholders_pending()))
+                if _store(response):
+                    return _page_entry(request, response)
+                return None
+
+            entry = get_or_compute(
+                page_cache_key(request, scopes), compute,
+                settings.PAGE_CACHE_TIMEOUT, name='page',
+            )
+            if rendered:
+                return _fill_response(request, *rendered[0])
+            return _from_entry(request, entry)
+        return inner
+    return decorator
+
+
+def _acached_page(view, scopes):
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        if not _cacheable(request):
+            return await view(request, *args, **kwargs)
+        rendered = []
+
+        async def compute():
+            token = holes.punching.set(True)
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                holes.punching.reset(token)
+            rendered.append((response, placeholders_pending()))
+            if _store(response):
+                return await sync_to_async(_page_entry)(request, response)
+            return None
+
+        entry = await aget_or_compute(
+            page_cache_key(request, scopes), compute,
+            settings.PAGE_CACHE_TIMEOUT, name='page',
+        )
+        if rendered:
+            return await sync_to_async(_fill_response)(
+                request, *rendered[0]
+            )
+        return await sync_to_async(_from_entry)(request, entry)
+    return inner
@@ -0,0 +1,102 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserStats
+
+
+def _count_subquery(queryset, field):
+    counts = queryset.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount_comments(post_ids=None):
+    """Сверить Post.comments_count с таблицей комментариев.
+
+    Без post_ids сверяются все посты. Возвращает число исправленных.
+    """
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    actual = _count_subquery(Comment.objects.all(), 'post')
+    return posts.exclude(comments_count=actual).update(
+        comments_count=actual
+    )
+
+
+def compute_user_stats(user):
+    return {
+        'followers_count': Follow.objects.filter(author=user).count(),
+        'following_count': Follow.objects.filter(user=user).count(),
+        'posts_count': Post.objects.filter(author=user).count(),
+    }
+
+
+def get_user_stats(user):
+    """Счётчики автора; при первом обращении считаются по таблицам.
+
+    Принимает пользователя или его id.
+    """
+    user_id = getattr(user, 'pk', user)
+    stats = UserStats.objects.filter(pk=user_id).first()
+    if stats is None:
+        stats, _ = UserStats.objects.get_or_create(
+            pk=user_id, defaults=compute_user_stats(user_id)
+        )
+    return stats
+
+
+async def aget_user_stats(user):
+    """То же, что get_user_stats, для асинхронных view."""
+    user_id = getattr(user, 'pk', user)
+    stats = await UserStats.objects.filter(pk=user_id).afirst()
+    if stats is None:
+        stats, _ = await UserStats.objects.aget_or_create(
+            pk=user_id, defaults={
+                'followers_count': await Follow.objects.filter(
+                    author=user_id).acount(),
+                'following_count': await Follow.objects.filter(
+                    user=user_id).acount(),
+                'posts_count': await Post.objects.filter(
+                    author=user_id).acount(),
+            }
+        )
+    return stats
+
+
+def change_user_stats(user_id, field, delta):
+    """Атомарно изменить один из счётчиков UserStats на delta.
+
+    Если записи ещё нет, ничего не делаем: она будет посчитана
+    целиком при первом обращении.
+    """
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    stats.update(**{field: F(field) + delta})
+
+
+def recount_user_stats():
+    """Сверить UserStats с таблицами подписок и постов.
+
+    Возвращает число исправленных записей.
+    """
+    followers = _count_subquery(Follow.objects.all(), 'author')
+    following = _count_subquery(Follow.objects.all(), 'user')
+    posts = _count_subquery(Post.objects.all(), 'author')
+    user_stats = UserStats.objects.annotate(
+        actual_followers=followers,
+        actual_following=following,
+        actual_posts=posts,
+    )
+    drifted = user_stats.filter(
+        ~Q(followers_count=F('actual_followers'))
+        | ~Q(following_count=F('actual_following'))
+        | ~Q(posts_count=F('actual_posts'))
+    ).values_list('pk', flat=True)
+    return UserStats.objects.filter(pk__in=list(drifted)).update(
+        followers_count=followers,
+        following_count=following,
+        posts_count=posts,
+    )
@@ -0,0 +1,55 @@
+"""
+Формат выгрузки контента (команды import_content и export_content).
+
+NDJSON: по записи на строку, тип записи — в поле type:
+
+    {"type": "user", "username": ..., "first_name": ..., "last_name": ...,
+     "email": ..., "password": хэш пароля, "date_joined": ISO 8601,
+     "is_active": ..., "is_staff": ..., "is_superuser": ...}
+    {"type": "group", "slug": ..., "title": ..., "description": ...}
+    {"type": "post", "id": ..., "text": ..., "pub_date": ISO 8601,
+     "updated": ISO 8601, "author": username, "group": slug или null,
+     "image": путь к файлу или null,
+     "comments": [{"author": username, "text": ..., "created": ...}]}
+    {"type": "follow", "user": username, "author": username}
+
+Выгрузка содержит хэши паролей: из неё восстанавливаются работающие
+учётные записи, поэтому хранить её нужно как секрет. Пользователь без
+password получает непригодный для входа пароль.
+
+Пользователи и сообщества идут раньше постов и подписок, которые на них
+ссылаются. Необязательные поля: id и updated поста (id используется
+только при import_content --keep-ids). Файлы с расширением .gz
+читаются и пишутся через gzip.
+
+CSV: одна таблица на файл, тип записей задаётся отдельно, колонки —
+поля записи этого типа (без вложенных комментариев).
+"""
+import csv
+import gzip
+import json
+
+RECORD_TYPES = ('user', 'group', 'post', 'follow')
+
+
+def open_dump(path, mode='rt'):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_records(path, record_type=None):
+    """
+    Записи выгрузки по порядку.
+
+    Если задан record_type, файл читается как CSV с записями этого типа,
+    иначе — как NDJSON.
+    """
+    with open_dump(path) as dump:
+        if record_type is not None:
+            for row in csv.DictReader(dump):
+                yield {'type': record_type, **row}
+            return
+        for line in dump:
+            if line.strip():
+                yield json.loads(line)
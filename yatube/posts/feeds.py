@@ -0,0 +1,184 @@
+"""
+RSS и Atom для общей ленты, сообществ и авторов.
+
+Документ отдаётся потоком: заголовок канала, затем записи по мере
+чтения постов через iterator(), затем закрывающие теги — в памяти
+никогда не лежит весь список. Каждая запись рендерится один раз:
+готовый XML кэшируется по id поста, времени его изменения и данным
+автора и сообщества.
+"""
+import io
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaksbr
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .cache import conditional_page, get_version, make_key
+from .models import Group, Post
+
+User = get_user_model()
+
+ITEM_TAGS = {'rss': 'item', 'atom': 'entry'}
+# Разделитель, на месте которого в документе окажутся записи
+ITEMS_MARKER = '<!--items-->'
+BATCH_SIZE = 100
+# Поля автора и сообщества в записи не меняют время изменения поста,
+# поэтому входят в ключ кэша записи сами
+RELATED_FIELDS = (
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__title',
+)
+POST_FIELDS = ('id', 'text', 'pub_date', 'updated', *RELATED_FIELDS)
+
+
+class StreamingFeedMixin:
+    """Генератор фида, который оставляет место под записи маркером."""
+
+    def __init__(self, *args, last_modified, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_modified = last_modified
+
+    def latest_post_date(self):
+        # Записи не хранятся в self.items — дата берётся из версии ленты
+        return self.last_modified
+
+    def write_items(self, handler):
+        handler.ignorableWhitespace(ITEMS_MARKER)
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    pass
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    pass
+
+
+FEED_CLASSES = {'rss': StreamingRssFeed, 'atom': StreamingAtomFeed}
+
+
+def render_item(feed, kind, request, row):
+    link = request.build_absolute_uri(
+        reverse('posts:post', args=[row['id']])
+    )
+    name = f"{row['author__first_name']} {row['author__last_name']}".strip()
+    feed.add_item(
+        title=Truncator(row['text']).chars(80),
+        link=link,
+        unique_id=link,
+        description=linebreaksbr(row['text'], autoescape=True),
+        author_name=name or row['author__username'],
+        pubdate=row['pub_date'],
+        updateddate=row['updated'],
+        categories=[row['group__title']] if row['group__title'] else (),
+    )
+    item = feed.items.pop()
+    output = io.StringIO()
+    handler = SimplerXMLGenerator(output, 'utf-8',
+                                  short_empty_elements=True)
+    handler.startElement(ITEM_TAGS[kind], feed.item_attributes(item))
+    feed.add_item_elements(handler, item)
+    handler.endElement(ITEM_TAGS[kind])
+    return output.getvalue()
+
+
+def _items(feed, kind, request, rows):
+    """Куски XML с записями; промахи кэша рендерятся пачкой."""
+    # Ссылки в записи абсолютные: схема и хост входят в ключ
+    site = request.build_absolute_uri('/')
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield _render_batch(feed, kind, request, site, batch)
+            batch = []
+    if batch:
+        yield _render_batch(feed, kind, request, site, batch)
+
+
+def _render_batch(feed, kind, request, site, rows):
+    keys = [
+        make_key('feed-item', kind, site, row['id'],
+                 row['updated'].timestamp(),
+                 tuple(row[field] for field in RELATED_FIELDS))
+        for row in rows
+    ]
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, row in zip(keys, rows):
+        if key not in cached:
+            missing[key] = render_item(feed, kind, request, row)
+    if missing:
+        cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    cached.update(missing)
+    return ''.join(cached[key] for key in keys)
+
+
+def stream_feed(request, kind, posts, title, link, description):
+    try:
+        limit = int(request.GET.get('limit', settings.SYNDICATION_ITEMS))
+    except ValueError:
+        limit = settings.SYNDICATION_ITEMS
+    limit = min(max(limit, 1), settings.SYNDICATION_MAX_ITEMS)
+
+    feed = FEED_CLASSES[kind](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+        last_modified=datetime.fromtimestamp(get_version('feed'),
+                                             tz=timezone.utc),
+    )
+    document = io.StringIO()
+    feed.write(document, 'utf-8')
+    head, tail = document.getvalue().split(ITEMS_MARKER)
+    rows = posts.order_by('-pub_date', '-id').values(*POST_FIELDS)[:limit]
+
+    def chunks():
+        yield head
+        yield from _items(feed, kind, request,
+                          rows.iterator(chunk_size=BATCH_SIZE))
+        yield tail
+
+    return StreamingHttpResponse(chunks(), content_type=feed.content_type)
+
+
+@conditional_page('feed')
+def index_feed(request, kind):
+    return stream_feed(
+        request, kind, Post.objects.all(),
+        title='Yatube: последние обновления',
+        link=reverse('posts:index'),
+        description='Последние записи на Yatube',
+    )
+
+
+@conditional_page('feed')
+def group_feed(request, slug, kind):
+    group = get_object_or_404(Group, slug=slug)
+    return stream_feed(
+        request, kind, group.posts.all(),
+        title=f'Yatube: {group.title}',
+        link=reverse('posts:group_posts', args=[slug]),
+        description=group.description,
+    )
+
+
+@conditional_page('feed')
+def profile_feed(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    return stream_feed(
+        request, kind, author.posts.all(),
+        title=f'Yatube: {author.get_full_name() or author.username}',
+        link=reverse('posts:profile', args=[username]),
+        description=f'Записи @{author.username}',
+    )
@@ -0,0 +1,88 @@
+"""Пользовательские фрагменты («дырки») в закэшированных страницах.
+
+Страница кэшируется целиком (cache.cached_page), а всё, что зависит
+от пользователя, — навигация, кнопка подписки, ссылки редактирования —
+выводится тегом {% hole %}. Пока страница рендерится для кэша, вместо
+фрагмента в HTML остаётся подписанная метка с именем шаблона и его
+аргументами, и fill_holes дорисовывает фрагменты для каждого запроса —
+как edge side includes, только в приложении.
+"""
+import re
+from contextvars import ContextVar
+
+from django.core import signing
+from django.template.loader import render_to_string
+
+from .forms import CommentForm
+from .models import Follow
+
+# Рендерится ли страница для кэша: тогда {% hole %} выводит метку
+punching = ContextVar('punching_holes', default=False)
+
+SALT = 'posts.holes'
+MARKER = '<!--hole:{}-->'
+MARKER_RE = re.compile(r'<!--hole:([\w.:-]+)-->')
+
+_contexts = {}
+
+
+def hole_context(template_name):
+    """Зарегистрировать функцию, считающую контекст фрагмента по запросу."""
+    def decorator(func):
+        _contexts[template_name] = func
+        return func
+    return decorator
+
+
+def render_hole(context, template_name, kwargs):
+    if punching.get():
+        payload = signing.dumps([template_name, kwargs], salt=SALT)
+        return MARKER.format(payload)
+    # Вне кэша фрагмент — обычный include со своими аргументами
+    template = context.template.engine.get_template(template_name)
+    with context.push(**kwargs):
+        return template.render(context)
+
+
+def fill_holes(content, request):
+    """Заменить метки в content фрагментами для request."""
+    def fill(match):
+        try:
+            template_name, kwargs = signing.loads(match[1], salt=SALT)
+        except signing.BadSignature:
+            return ''
+        context = dict(kwargs)
+        if template_name in _contexts:
+            context.update(_contexts[template_name](request, **kwargs))
+        return render_to_string(template_name, context, request)
+
+    return MARKER_RE.sub(fill, content)
+
+
+@hole_context('includes/follow_button.html')
+def follow_button(request, author_username):
+    if not request.user.is_authenticated:
+        return {}
+    if request.user.username == author_username:
+        return {'self_following': True}
+    return {
+        'following': Follow.objects.filter(
+            user=request.user, author__username=author_username
+        ).exists(),
+    }
+
+
+@hole_context('includes/post_actions.html')
+@hole_context('includes/comment_actions.html')
+def post_actions(request, author_username, **kwargs):
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'authenticated_user': True,
+        'editing_permitted': request.user.username == author_username,
+    }
+
+
+@hole_context('includes/add_comment_card.html')
+def add_comment_card(request, **kwargs):
+    return {'form': CommentForm()}
@@ -0,0 +1,314 @@
+"""
+Массовая загрузка контента из выгрузки (см. posts.dumps).
+
+Записи вставляются пачками через bulk_create, внешние ключи
+(username -> id пользователя, slug -> id сообщества) разрешаются
+одним запросом на пачку. Сигналы при этом не срабатывают, поэтому
+после загрузки счётчики, ленты подписок и поисковый индекс
+пересчитываются целиком — rebuild_derived.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import touch_version
+from .counters import recount_comments, recount_user_stats
+from .dumps import RECORD_TYPES
+from .models import Comment, Follow, Group, Post
+from .search import get_backend
+from .timelines import rebuild_timelines
+
+User = get_user_model()
+
+# Сколько ошибок по отдельным записям запоминать для отчёта
+MAX_ERRORS = 100
+# Не больше параметров в одном запросе, чем позволяет SQLite
+DELETE_BATCH_SIZE = 500
+
+
+class DumpError(Exception):
+    """Запись выгрузки нельзя загрузить."""
+
+
+def rebuild_derived():
+    """Пересчитать всё, что обычно поддерживают сигналы."""
+    recount_comments()
+    recount_user_stats()
+    rebuild_timelines()
+    get_backend().rebuild()
+    touch_version('feed')
+    touch_version('follow')
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise DumpError(f'Некорректная дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _delete_comments(post_ids):
+    """Удалить комментарии постов без сигналов, как и вся загрузка.
+
+    Обычный delete() вызвал бы сигналы на каждый комментарий; на
+    комментарии ничто не ссылается, поэтому каскадов нет. Счётчики
+    постов пересчитываются после вставки новых комментариев.
+    """
+    with connection.cursor() as cursor:
+        for start in range(0, len(post_ids), DELETE_BATCH_SIZE):
+            batch = post_ids[start:start + DELETE_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {Comment._meta.db_table} '
+                f'WHERE post_id IN ({placeholders})',
+                batch,
+            )
+
+
+def _flag(value, default):
+    """Флаг из NDJSON (bool) или CSV (строка)."""
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+class Importer:
+    """
+    Загрузчик пачек записей.
+
+    С keep_ids посты сохраняют id из выгрузки: уже существующие посты
+    с такими id заменяются вместе с комментариями — так на полную копию
+    накатывается инкрементальная выгрузка export_content --since.
+
+    В created считаются созданные объекты по типам, в skipped —
+    пропущенные записи; первые MAX_ERRORS ошибок хранятся в errors
+    парами (номер записи, текст).
+    """
+
+    def __init__(self, images_dir=None, workers=4, keep_ids=False):
+        self.images_dir = images_dir
+        self.workers = workers
+        self.keep_ids = keep_ids
+        self.created = dict.fromkeys(('user', 'group', 'post', 'comment',
+                                      'follow'), 0)
+        self.skipped = 0
+        self.errors = []
+        self._user_ids = {}
+        self._group_ids = {}
+
+    def _skip(self, number, error):
+        self.skipped += 1
+        self._error(number, error)
+
+    def _error(self, number, error):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((number, str(error)))
+
+    def _resolve(self, cache, model, field, keys):
+        """Дополнить cache id объектов по ключам keys одним запросом."""
+        missing = {key for key in keys if key and key not in cache}
+        if missing:
+            cache.update(model.objects.filter(
+                **{f'{field}__in': missing}
+            ).values_list(field, 'id'))
+
+    def _user_id(self, username):
+        if username not in self._user_ids:
+            raise DumpError(f'Нет пользователя {username}')
+        return self._user_ids[username]
+
+    def _group_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self._group_ids:
+            raise DumpError(f'Нет сообщества {slug}')
+        return self._group_ids[slug]
+
+    def load(self, batch):
+        """Загрузить пачку [(номер записи, запись), ...] одной транзакцией."""
+        by_type = {record_type: [] for record_type in RECORD_TYPES}
+        for number, record in batch:
+            if record.get('type') not in by_type:
+                self._skip(number, f"Неизвестный тип {record.get('type')}")
+                continue
+            by_type[record['type']].append((number, record))
+        with transaction.atomic():
+            self._load_users(by_type['user'])
+            self._load_groups(by_type['group'])
+            self._resolve(self._user_ids, User, 'username', {
+                username
+                for _, record in by_type['post'] + by_type['follow']
+                for username in (
+                    [record.get('author'), record.get('user')]
+                    + [comment.get('author')
+                       for comment in record.get('comments') or ()]
+                )
+            })
+            self._resolve(self._group_ids, Group, 'slug', {
+                record.get('group') for _, record in by_type['post']
+            })
+            self._load_posts(by_type['post'])
+            self._load_follows(by_type['follow'])
+
+    def _new(self, records, cache, model, field):
+        """Записи, объектов для которых ещё нет, без повторов."""
+        self._resolve(cache, model, field,
+                      {record.get(field) for _, record in records})
+        new = {}
+        for number, record in records:
+            if not record.get(field):
+                self._skip(number, f'Нет поля {field}')
+            elif record[field] not in cache:
+                new[record[field]] = record
+        return new.values()
+
+    def _load_users(self, records):
+        users = []
+        for record in self._new(records, self._user_ids, User, 'username'):
+            user = User(username=record['username'],
+                        first_name=record.get('first_name') or '',
+                        last_name=record.get('last_name') or '',
+                        email=record.get('email') or '',
+                        date_joined=_parse_date(record.get('date_joined')),
+                        is_active=_flag(record.get('is_active'), True),
+                        is_staff=_flag(record.get('is_staff'), False),
+                        is_superuser=_flag(record.get('is_superuser'),
+                                           False))
+            if record.get('password'):
+                user.password = record['password']
+            else:
+                user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        self.created['user'] += len(users)
+
+    def _load_groups(self, records):
+        groups = [
+            Group(slug=record['slug'], title=record.get('title') or '',
+                  description=record.get('description') or '')
+            for record in self._new(records, self._group_ids, Group, 'slug')
+        ]
+        Group.objects.bulk_create(groups, ignore_conflicts=True)
+        self.created['group'] += len(groups)
+
+    def _images(self, records):
+        """
+        Имена картинок постов в хранилище, по порядку записей.
+
+        Если задан каталог с картинками, файлы копируются из него
+        в хранилище в несколько потоков.
+        """
+        if not self.images_dir:
+            return [record.get('image') or '' for _, record in records]
+
+        def copy(record):
+            if not record.get('image'):
+                return ''
+            source = os.path.join(self.images_dir, record['image'])
+            try:
+                with open(source, 'rb') as image:
+                    return default_storage.save(
+                        f"posts/{os.path.basename(record['image'])}",
+                        File(image),
+                    )
+            except OSError:
+                self._error(None, f'Нет файла {source}')
+                return ''
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(copy, [record for _, record in records]))
+
+    def _build_post(self, record, image):
+        """Пост и его комментарии из записи (ещё не сохранённые)."""
+        if not record.get('text'):
+            raise DumpError('Пустой текст поста')
+        post = Post(
+            pk=int(record['id']) if self.keep_ids else None,
+            text=record['text'],
+            author_id=self._user_id(record.get('author')),
+            group_id=self._group_id(record.get('group')),
+            image=image,
+        )
+        post.dump_date = _parse_date(record.get('pub_date'))
+        post.dump_updated = (_parse_date(record['updated'])
+                             if record.get('updated') else post.dump_date)
+        comments = []
+        for item in record.get('comments') or ():
+            comment = Comment(author_id=self._user_id(item.get('author')),
+                              text=item['text'])
+            comment.dump_date = _parse_date(item.get('created'))
+            comments.append(comment)
+        return post, comments
+
+    def _load_posts(self, records):
+        posts, comments = [], []
+        for (number, record), image in zip(records, self._images(records)):
+            try:
+                post, post_comments = self._build_post(record, image)
+            except (DumpError, KeyError, TypeError, ValueError) as error:
+                self._skip(number, error)
+                continue
+            posts.append(post)
+            comments.append(post_comments)
+
+        if self.keep_ids:
+            _delete_comments([post.pk for post in posts])
+            Post.objects.bulk_create(
+                posts, update_conflicts=True, unique_fields=['id'],
+                update_fields=['text', 'author_id', 'group_id', 'image'],
+            )
+        else:
+            Post.objects.bulk_create(posts)
+        # auto_now_add и auto_now при вставке ставят текущее время —
+        # возвращаем даты из выгрузки
+        for post in posts:
+            post.pub_date = post.dump_date
+            post.updated = post.dump_updated
+        Post.objects.bulk_update(posts, ['pub_date', 'updated'])
+
+        post_comments, comments = comments, []
+        for post, items in zip(posts, post_comments):
+            for comment in items:
+                comment.post_id = post.pk
+                comments.append(comment)
+        Comment.objects.bulk_create(comments)
+        for comment in comments:
+            comment.created = comment.dump_date
+        Comment.objects.bulk_update(comments, ['created'])
+        recount_comments([post.pk for post in posts])
+        self.created['post'] += len(posts)
+        self.created['comment'] += len(comments)
+
+    def _load_follows(self, records):
+        pairs = set()
+        for number, record in records:
+            try:
+                user_id = self._user_id(record.get('user'))
+                author_id = self._user_id(record.get('author'))
+            except DumpError as error:
+                self._skip(number, error)
+                continue
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        if not pairs:
+            return
+        existing = set(Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id'))
+        follows = [Follow(user_id=user_id, author_id=author_id)
+                   for user_id, author_id in pairs - existing]
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.created['follow'] += len(follows)
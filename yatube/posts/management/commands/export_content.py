@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.dumps import open_dump
+from posts.exporting import BATCH_SIZE, export_records, media_entry
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, сообщества, посты с комментариями '
+            'и подписки в NDJSON (формат — posts.dumps) для резервной '
+            'копии или переноса; загружается обратно import_content.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Файл выгрузки; .gz — со сжатием, - — stdout.'
+        )
+        parser.add_argument(
+            '--since',
+            help='Только изменения начиная с этого момента (ISO 8601).'
+        )
+        parser.add_argument(
+            '--media-manifest',
+            help='Файл со списком картинок выгруженных постов '
+                 '(имя, размер, время изменения) для копирования медиа.'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Некорректная дата {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        # В stdout может идти сама выгрузка — отчёт пишем в stderr
+        report = self.stderr if options['output'] == '-' else self.stdout
+        manifest = None
+        if options['media_manifest']:
+            manifest = open_dump(options['media_manifest'], 'wt')
+        output = (self.stdout if options['output'] == '-'
+                  else open_dump(options['output'], 'wt'))
+        counts = {}
+        start = time.perf_counter()
+        try:
+            for record in export_records(since, options['batch_size']):
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                counts[record['type']] = counts.get(record['type'], 0) + 1
+                if manifest is not None and record.get('image'):
+                    manifest.write(json.dumps(
+                        media_entry(record['image']), ensure_ascii=False
+                    ) + '\n')
+        finally:
+            if output is not self.stdout:
+                output.close()
+            if manifest is not None:
+                manifest.close()
+
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        summary = ', '.join(f'{name}: {count}'
+                            for name, count in counts.items())
+        report.write(self.style.SUCCESS(
+            f'Выгружено записей: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} записей/с) — {summary}'
+        ))
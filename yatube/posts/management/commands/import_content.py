@@ -0,0 +1,113 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.dumps import RECORD_TYPES, read_records
+from posts.importing import Importer, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, сообщества, посты с комментариями '
+            'и подписки из выгрузки NDJSON или CSV (формат — posts.dumps).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки (.ndjson[.gz], .csv)')
+        parser.add_argument(
+            '--csv', dest='record_type', choices=RECORD_TYPES,
+            help='Читать файл как CSV с записями этого типа.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог, относительно которого указаны картинки постов; '
+                 'файлы копируются в MEDIA_ROOT.'
+        )
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоков для копирования картинок.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с числом загруженных записей; по умолчанию '
+                 '<path>.checkpoint. При повторном запуске загрузка '
+                 'продолжается с этого места.'
+        )
+        parser.add_argument(
+            '--keep-ids', action='store_true',
+            help='Сохранять id постов из выгрузки, заменяя существующие '
+                 '(восстановление из export_content).'
+        )
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать заново, не глядя на checkpoint.')
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс '
+                 '(например, если дальше будет загружен ещё один файл).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Нет файла {path}')
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        done = 0 if options['restart'] else self._read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Продолжаем с записи {done + 1}')
+
+        importer = Importer(images_dir=options['images_dir'],
+                            workers=options['workers'],
+                            keep_ids=options['keep_ids'])
+        records = enumerate(read_records(path, options['record_type']), 1)
+        records = islice(records, done, None)
+        start = time.perf_counter()
+        loaded = 0
+        try:
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                importer.load(batch)
+                done = batch[-1][0]
+                loaded += len(batch)
+                self._write_checkpoint(checkpoint, done)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{done} записей, {loaded / elapsed:.0f} записей/с'
+                )
+        except (ValueError, KeyError) as error:
+            raise CommandError(
+                f'Ошибка в выгрузке после записи {done}: {error}'
+            )
+
+        for number, error in importer.errors:
+            self.stderr.write(f'Запись {number}: {error}' if number
+                              else error)
+        if not options['skip_rebuild']:
+            self.stdout.write('Пересчёт счётчиков, лент и индекса')
+            rebuild_derived()
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        elapsed = time.perf_counter() - start
+        created = ', '.join(
+            f'{name}: {count}' for name, count in importer.created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено за {elapsed:.1f} с ({loaded / max(elapsed, 1e-9):.0f}'
+            f' записей/с). Создано — {created}; пропущено записей: '
+            f'{importer.skipped}'
+        ))
+
+    def _read_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint, encoding='utf-8') as state:
+                return json.load(state)['records']
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, checkpoint, records):
+        temporary = f'{checkpoint}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as state:
+            json.dump({'records': records}, state)
+        os.replace(temporary, checkpoint)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.timelines import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def handle(self, *args, **options):
+        created = rebuild_timelines()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах подписок: {created}'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_comments, recount_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с реальными данными.'
+
+    def handle(self, *args, **options):
+        fixed = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {fixed}'
+        ))
+        fixed = recount_user_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено записей статистики пользователей: {fixed}'
+        ))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def fts5_available(connection):
+    # Та же проверка, что в posts.search.fts5.fts5_available; здесь
+    # своя копия, чтобы миграция не зависела от кода приложения
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    # Полнотекстовый индекс есть только у SQLite с FTS5; без него
+    # posts.search.get_backend выбирает запасной бэкенд
+    if not fts5_available(schema_editor.connection):
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5('
+        'text, author, group_title, comments, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(f'''
+        INSERT INTO posts_search (rowid, text, author, group_title, comments)
+        SELECT p.id, p.text,
+               u.username || ' ' || u.first_name || ' ' || u.last_name,
+               COALESCE(g.title, ''),
+               COALESCE((SELECT group_concat(c.text, ' ')
+                         FROM posts_comment c
+                         WHERE c.post_id = p.id), '')
+        FROM posts_post p
+        JOIN {User._meta.db_table} u ON u.id = p.author_id
+        LEFT JOIN posts_group g ON g.id = p.group_id
+    ''')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -11,6 +11,9 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True, verbose_name='дата изменения'
+    )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='posts',
         verbose_name='автор поста'
@@ -22,9 +25,23 @@ class Post(models.Model):
     image = models.ImageField(
         upload_to='posts/', blank=True, verbose_name='изображение'
     )
+    # Денормализованный счётчик: поддерживается сигналами модели Comment
+    # (posts/signals.py), сверяется командой recount_counters
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='число комментариев'
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        # Ленты сортируются по (pub_date, id) — см. posts.paginators
+        indexes = [
+            models.Index(fields=['pub_date', 'id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date', 'id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date', 'id'],
+                         name='post_author_pub_date_idx'),
+        ]
         verbose_name = 'пост'
         verbose_name_plural = 'посты'
 
@@ -63,6 +80,11 @@ class Comment(models.Model):
     )
 
     class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
 
@@ -86,9 +108,75 @@ class Follow(models.Model):
     class Meta:
         constraints = [models.UniqueConstraint(fields=['user', 'author'],
                        name='unique_subscription')]
+        # Покрывающий индекс для выборки подписчиков автора
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
         verbose_name = 'подписка'
         verbose_name_plural = 'подписки'
 
     def __str__(self):
         follow_view = f'Подписка {self.user} на {self.author}'
         return follow_view
+
+
+class UserStats(models.Model):
+    """Счётчики для карточки автора.
+
+    Поддерживаются сигналами моделей Follow и Post (posts/signals.py);
+    запись создаётся лениво при первом обращении (posts.counters)
+    и сверяется командой recount_counters.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='пользователь'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name='подписан(а) на'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='записей'
+    )
+
+    class Meta:
+        verbose_name = 'статистика пользователя'
+        verbose_name_plural = 'статистика пользователей'
+
+    def __str__(self):
+        return f'Статистика {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+
+    Заполняется при публикации поста и при подписке (posts/timelines.py).
+    Посты авторов с очень большим числом подписчиков сюда не попадают —
+    они подмешиваются в ленту при чтении.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='timeline',
+        verbose_name='читатель'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='timeline_entries',
+        verbose_name='пост'
+    )
+    # Копия Post.pub_date: лента читается одним проходом по индексу
+    pub_date = models.DateTimeField(verbose_name='дата публикации поста')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'post'],
+                       name='unique_timeline_entry')]
+        indexes = [
+            models.Index(fields=['user', 'pub_date', 'post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+        verbose_name = 'запись ленты подписок'
+        verbose_name_plural = 'записи ленты подписок'
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
@@ -0,0 +1,315 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from core.db import reading_from_primary
+
+from .cache import make_key
+
+# Дальше этой страницы по номеру не листают; больший номер не даёт
+# переполнить OFFSET и ведёт, как и любая пустая страница, на первую
+MAX_PAGE_NUMBER = 10 ** 6
+# Целые значения ключа курсора, которые принимает SQLite
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def parse_page_number(value):
+    """Номер страницы из ?page=: от 1 до MAX_PAGE_NUMBER, иначе 1."""
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 1
+    return min(max(number, 1), MAX_PAGE_NUMBER)
+
+
+class CursorPage(Page):
+    """Страница, соседние страницы которой адресуются курсорами."""
+
+    def __init__(self, object_list, number, paginator,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, number, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу (pub_date, id).
+
+    Соседние страницы выбираются условием по ключу последней (первой)
+    записи текущей страницы, поэтому база читает только per_page + 1
+    строк из индекса — без OFFSET и без COUNT(*) по всей таблице.
+    Общее число записей считается только по запросу (approximate_count)
+    и кэшируется, то есть может немного отставать от реального.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, object_list, per_page, ordering=None,
+                 approximate_count=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if approximate_count is None:
+            approximate_count = settings.PAGINATOR_APPROXIMATE_COUNT
+        self.approximate_count = approximate_count
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    @property
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, row, number):
+        values = []
+        for name in self._field_names:
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat')
+                          else value)
+        raw = json.dumps([values, number]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Вернуть (значения ключа, номер страницы) или None.
+
+        Любой испорченный курсор — не base64, не JSON, значения
+        не того типа или вне диапазона базы — считается некорректным.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values, number = json.loads(base64.urlsafe_b64decode(padded))
+            if len(values) != len(self.ordering):
+                return None
+            values = [
+                self._decode_value(name, value)
+                for name, value in zip(self._field_names, values)
+            ]
+        except (TypeError, ValueError, LookupError, OverflowError,
+                ValidationError):
+            return None
+        return values, parse_page_number(number)
+
+    def _decode_value(self, name, value):
+        if isinstance(value, bool) or not isinstance(
+            value, (str, int, float)
+        ):
+            raise ValueError(f'Некорректное значение ключа: {value!r}')
+        value = self._key_field(name).to_python(value)
+        if value is None or (
+            isinstance(value, int) and value not in INTEGER_RANGE
+        ):
+            raise ValueError(f'Некорректное значение ключа: {value!r}')
+        return value
+
+    def _key_field(self, name):
+        # Ключ может быть и полем модели, и аннотацией запроса
+        annotations = self.object_list.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _keyset_filter(self, values, forward):
+        """Условие «строго после» (forward) или «строго до» ключа."""
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[position]})
+            for previous, value in zip(self._field_names[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+    def page_after(self, cursor):
+        return self._fetch(self._plan_after(cursor))
+
+    def page_before(self, cursor):
+        return self._fetch(self._plan_before(cursor))
+
+    def page_at(self, number):
+        """
+        Страница по номеру: поддерживается для старых ссылок ?page=N.
+
+        Работает через OFFSET, но без COUNT(*); дальше навигация
+        продолжается курсорами.
+        """
+        return self._fetch(self._plan_at(number))
+
+    # Выборка страницы разделена на план (запрос строк) и сборку
+    # страницы из строк, чтобы строки можно было читать и синхронно,
+    # и асинхронно (aget_cursor_page)
+
+    def _plan_after(self, cursor):
+        decoded = self.decode_cursor(cursor)
+        if decoded is None:
+            return self._plan_at(1)
+        values, number = decoded
+        rows = self.object_list.filter(self._keyset_filter(values, True))
+        return rows[:self.per_page + 1], number, 'after'
+
+    def _plan_before(self, cursor):
+        decoded = self.decode_cursor(cursor)
+        if decoded is None:
+            return self._plan_at(1)
+        values, number = decoded
+        rows = (
+            self.object_list
+            .filter(self._keyset_filter(values, False))
+            .order_by(*self._reversed_ordering())
+        )
+        return rows[:self.per_page + 1], number, 'before'
+
+    def _plan_at(self, number):
+        bottom = (number - 1) * self.per_page
+        return (self.object_list[bottom:bottom + self.per_page + 1],
+                number, 'at')
+
+    def _plan(self, params):
+        if params.get('after'):
+            return self._plan_after(params['after'])
+        if params.get('before'):
+            return self._plan_before(params['before'])
+        return self._plan_at(parse_page_number(params.get('page', 1)))
+
+    def _finish(self, rows, number, kind):
+        """Страница из выбранных строк; None — нужна первая страница."""
+        if kind == 'after':
+            return self._build_page(rows, number, has_previous=True)
+        if kind == 'before':
+            if not rows:
+                return None
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            if not has_previous:
+                # Дошли до начала ленты — это первая страница,
+                # как бы курсор ни называл её номер
+                number = 1
+            page = self._build_page(rows, number, has_previous=has_previous)
+            if page.next_cursor is None:
+                page.next_cursor = self.encode_cursor(rows[-1], number + 1)
+            return page
+        if not rows and number > 1:
+            return None
+        return self._build_page(rows, number, has_previous=number > 1)
+
+    def _fetch(self, plan):
+        rows, number, kind = plan
+        page = self._finish(list(rows), number, kind)
+        return page if page is not None else self.page_at(1)
+
+    async def _afetch(self, plan):
+        rows, number, kind = plan
+        page = self._finish([row async for row in rows], number, kind)
+        if page is None:
+            return await self._afetch(self._plan_at(1))
+        return page
+
+    def _build_page(self, rows, number, has_previous):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], number + 1)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], number - 1)
+        return self._get_page(rows, number, self, next_cursor=next_cursor,
+                              previous_cursor=previous_cursor)
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def rows_after(self, cursor=None):
+        """
+        Запрос строк следующей после курсора страницы — без выборки.
+
+        В запросе на одну строку больше, чем per_page: по ней видно, есть
+        ли следующая страница. Возвращает (запрос, номер страницы) или
+        None, если курсор некорректен. Нужен, когда строки читаются
+        потоком, а не списком.
+        """
+        if not cursor:
+            return self.object_list[:self.per_page + 1], 1
+        decoded = self.decode_cursor(cursor)
+        if decoded is None:
+            return None
+        values, number = decoded
+        rows = self.object_list.filter(self._keyset_filter(values, True))
+        return rows[:self.per_page + 1], number
+
+    def get_cursor_page(self, params):
+        """
+        Страница по GET-параметрам запроса: after, before или page.
+
+        Некорректные значения, как и в Paginator.get_page,
+        приводят к первой странице.
+        """
+        return self._fetch(self._plan(params))
+
+    async def aget_cursor_page(self, params):
+        """То же, что get_cursor_page, для асинхронных view."""
+        return await self._afetch(self._plan(params))
+
+    @property
+    def count_cache_key(self):
+        return make_key('count', self.object_list.query)
+
+    @property
+    def count(self):
+        """Приблизительное (кэшированное) число записей или None."""
+        if not self.approximate_count:
+            return None
+        if not hasattr(self, '_count'):
+            key = self.count_cache_key
+            self._count = cache.get(key)
+            if self._count is None:
+                # Общая запись кэша не заполняется с отставшей реплики
+                with reading_from_primary():
+                    self._count = self.object_list.count()
+                cache.set(key, self._count,
+                          settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+        return self._count
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return super().num_pages
+
+    @property
+    def page_range(self):
+        if self.num_pages is None:
+            return range(0)
+        return super().page_range
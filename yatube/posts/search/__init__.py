@@ -0,0 +1,77 @@
+"""
+Поиск по постам.
+
+Бэкенд задаётся настройкой POSTS_SEARCH_BACKEND: по умолчанию
+полнотекстовый индекс SQLite FTS5, для других баз —
+posts.search.database.DatabaseSearchBackend.
+"""
+from django.conf import settings
+from django.core.paginator import Page
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from posts.models import Post
+
+from .fts5 import fts5_available
+
+FTS5_BACKEND = 'posts.search.fts5.FTS5SearchBackend'
+# Замена FTS5, если база его не поддерживает: SQLite без модуля fts5
+# или другая СУБД
+FALLBACK_BACKENDS = {
+    'sqlite': 'posts.search.inprocess.InProcessSearchBackend',
+}
+DEFAULT_FALLBACK_BACKEND = 'posts.search.database.DatabaseSearchBackend'
+
+
+def backend_path():
+    """Путь к классу бэкенда с учётом поддержки FTS5 базой."""
+    path = settings.POSTS_SEARCH_BACKEND
+    if path == FTS5_BACKEND and not fts5_available():
+        return FALLBACK_BACKENDS.get(connection.vendor,
+                                     DEFAULT_FALLBACK_BACKEND)
+    return path
+
+
+def get_backend():
+    return import_string(backend_path())()
+
+
+class SearchPage(Page):
+    """Страница результатов без подсчёта их общего числа."""
+
+    def __init__(self, object_list, number, has_next):
+        super().__init__(object_list, number, paginator=None)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<SearchPage {self.number}>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def search_page(query, number, per_page, author_id=None, group_id=None):
+    """
+    Страница результатов поиска с постами в порядке релевантности.
+
+    У бэкенда запрашивается на одну запись больше, чтобы узнать,
+    есть ли следующая страница, не считая все совпадения.
+    """
+    ids = get_backend().search(
+        query, per_page + 1, offset=(number - 1) * per_page,
+        author_id=author_id, group_id=group_id,
+    )
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        ids[:per_page]
+    )
+    found = [posts[post_id] for post_id in ids[:per_page] if post_id in posts]
+    return SearchPage(found, number, has_next=len(ids) > per_page)
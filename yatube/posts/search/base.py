@@ -0,0 +1,34 @@
+import re
+
+# Слова запроса: буквы и цифры любого алфавита
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 10
+
+
+def split_terms(query):
+    return TERM_RE.findall(query)[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    """
+    Интерфейс поискового индекса постов.
+
+    В индекс попадают текст поста, автор, название сообщества
+    и комментарии. Бэкенд возвращает id постов в порядке
+    релевантности; сами посты view достаёт из базы.
+    """
+
+    def update(self, post_ids):
+        """Переиндексировать посты (удалённые — убрать из индекса)."""
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Собрать индекс заново, вернуть число проиндексированных постов."""
+        raise NotImplementedError
+
+    def search(self, query, limit, offset=0, author_id=None, group_id=None):
+        """id постов, подходящих под все слова запроса, лучшие первыми."""
+        raise NotImplementedError
@@ -0,0 +1,45 @@
+from django.db.models import Q
+
+from posts.models import Post
+
+from .base import BaseSearchBackend, split_terms
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Поиск через LIKE без отдельного индекса.
+
+    Годится для баз без полнотекстового поиска и для тестов;
+    каждый запрос просматривает всю таблицу постов. На SQLite LIKE
+    не различает регистр только у латиницы.
+    """
+
+    def update(self, post_ids):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self):
+        return Post.objects.count()
+
+    def search(self, query, limit, offset=0, author_id=None, group_id=None):
+        terms = split_terms(query)
+        if not terms:
+            return []
+        posts = Post.objects.all()
+        for term in terms:
+            posts = posts.filter(
+                Q(text__icontains=term)
+                | Q(author__username__icontains=term)
+                | Q(author__first_name__icontains=term)
+                | Q(author__last_name__icontains=term)
+                | Q(group__title__icontains=term)
+                | Q(comments__text__icontains=term)
+            )
+        if author_id is not None:
+            posts = posts.filter(author_id=author_id)
+        if group_id is not None:
+            posts = posts.filter(group_id=group_id)
+        posts = posts.distinct().order_by('-pub_date', '-id')
+        return list(posts.values_list('id', flat=True)[offset:offset + limit])
@@ -0,0 +1,126 @@
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+
+from posts.models import Comment, Group, Post
+
+from .base import BaseSearchBackend, split_terms
+
+User = get_user_model()
+
+TABLE = 'posts_search'
+# Веса колонок для bm25: text, author, group_title, comments
+WEIGHTS = (4.0, 2.0, 2.0, 1.0)
+# Не больше параметров в одном запросе, чем позволяет SQLite
+BATCH_SIZE = 500
+
+
+def document_sql(where=''):
+    """SELECT, собирающий документы индекса из таблиц постов."""
+    return f'''
+        SELECT p.id, p.text,
+               u.username || ' ' || u.first_name || ' ' || u.last_name,
+               COALESCE(g.title, ''),
+               COALESCE((SELECT group_concat(c.text, ' ')
+                         FROM {Comment._meta.db_table} c
+                         WHERE c.post_id = p.id), '')
+        FROM {Post._meta.db_table} p
+        JOIN {User._meta.db_table} u ON u.id = p.author_id
+        LEFT JOIN {Group._meta.db_table} g ON g.id = p.group_id
+        {where}
+    '''
+
+
+INSERT_SQL = (
+    f'INSERT INTO {TABLE} (rowid, text, author, group_title, comments) '
+)
+
+
+@lru_cache(maxsize=None)
+def fts5_available(alias='default'):
+    """Собран ли SQLite базы alias с FTS5.
+
+    Так же проверяет миграция 0011_search_index: без FTS5 она не создаёт
+    таблицу индекса, а get_backend выбирает запасной бэкенд.
+    """
+    db = connections[alias]
+    if db.vendor != 'sqlite':
+        return False
+    with db.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+class FTS5SearchBackend(BaseSearchBackend):
+    """
+    Полнотекстовый индекс на виртуальной таблице SQLite FTS5.
+
+    Таблица создаётся миграцией, rowid документа совпадает с id поста.
+    Слова запроса ищутся по префиксу (пост* найдёт «постов»),
+    результаты ранжируются bm25 — выбор идёт по инвертированному
+    индексу, а не просмотром таблицы постов.
+    """
+
+    def update(self, post_ids):
+        with connection.cursor() as cursor:
+            for batch in _batches(post_ids):
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(
+                    f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})',
+                    batch,
+                )
+                cursor.execute(
+                    INSERT_SQL
+                    + document_sql(f'WHERE p.id IN ({placeholders})'),
+                    batch,
+                )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            for batch in _batches(post_ids):
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(
+                    f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})',
+                    batch,
+                )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            cursor.execute(INSERT_SQL + document_sql())
+            cursor.execute(
+                f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')"
+            )
+            cursor.execute(f'SELECT count(*) FROM {TABLE}')
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit, offset=0, author_id=None, group_id=None):
+        terms = split_terms(query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        where = [f'{TABLE} MATCH %s']
+        params = [match]
+        if author_id is not None:
+            where.append('p.author_id = %s')
+            params.append(author_id)
+        if group_id is not None:
+            where.append('p.group_id = %s')
+            params.append(group_id)
+        weights = ', '.join(str(weight) for weight in WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {TABLE}.rowid FROM {TABLE} '
+                f'JOIN {Post._meta.db_table} p ON p.id = {TABLE}.rowid '
+                f'WHERE {" AND ".join(where)} '
+                f'ORDER BY bm25({TABLE}, {weights}) LIMIT %s OFFSET %s',
+                params + [limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
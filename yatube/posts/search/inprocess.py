@@ -0,0 +1,322 @@
+"""
+Инвертированный индекс на чистом Python — для сборок SQLite без FTS5.
+
+Индекс состоит из базового сегмента (posts.search.segment), который
+отображается в память, и журнала изменений: каждое сохранение или
+удаление поста дописывает строку в journal.log. Все процессы сервера
+при поиске дочитывают журнал с места, где остановились, поэтому
+изменения из одного процесса видны остальным без перезапуска.
+Команда rebuild_search_index собирает новый сегмент и начинает журнал
+заново; прежний журнал действует, пока сегмент не заменён.
+"""
+import json
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from posts.models import Comment, Post
+
+from .base import MAX_TERMS, BaseSearchBackend
+from .russian import tokenize
+from .segment import Segment, write_segment
+
+SEGMENT_NAME = 'base.idx'
+JOURNAL_NAME = 'journal.log'
+BATCH_SIZE = 500
+
+
+class InvertedIndex:
+    """Сегмент плюс изменения из журнала, применённые в памяти."""
+
+    def __init__(self, directory):
+        self.segment_path = os.path.join(directory, SEGMENT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._signature = self._segment_signature()
+        self.segment = Segment(self.segment_path)
+        self._reset()
+
+    def _reset(self):
+        self._journal_position = 0
+        self._journal_inode = None
+        # Документы из журнала и скрытые ими или удалённые документы
+        # сегмента
+        self._docs = {}
+        self._deleted = set()
+        self._terms = defaultdict(set)
+
+    def _segment_signature(self):
+        try:
+            stat = os.stat(self.segment_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _rotated_path(self, signature):
+        """Прежний журнал, который действует вместе с сегментом signature."""
+        suffix = '-'.join(map(str, signature or ('empty',)))
+        return os.path.join(self.directory, f'journal-{suffix}.log')
+
+    def _refresh(self):
+        signature = self._segment_signature()
+        if signature != self._signature:
+            self.segment.close()
+            self.segment = Segment(self.segment_path)
+            self._signature = signature
+            self._reset()
+        try:
+            with open(self.journal_path, 'rb') as journal:
+                stat = os.fstat(journal.fileno())
+                if (stat.st_ino != self._journal_inode
+                        or stat.st_size < self._journal_position):
+                    self._reset()
+                    self._journal_inode = stat.st_ino
+                    self._apply_lines(self._read_rotated())
+                journal.seek(self._journal_position)
+                data = journal.read()
+        except FileNotFoundError:
+            return
+        # Последняя строка может быть дописана не до конца
+        complete = data[:data.rfind(b'\n') + 1]
+        self._journal_position += len(complete)
+        self._apply_lines(complete)
+
+    def _read_rotated(self):
+        try:
+            with open(self._rotated_path(self._signature), 'rb') as journal:
+                data = journal.read()
+        except FileNotFoundError:
+            return b''
+        return data[:data.rfind(b'\n') + 1]
+
+    def _apply_lines(self, data):
+        for line in data.splitlines():
+            self._apply(json.loads(line))
+
+    def _apply(self, record):
+        doc_id = record['id']
+        previous = self._docs.pop(doc_id, None)
+        if previous is not None:
+            for term in previous[0]:
+                self._terms[term].discard(doc_id)
+        # Скрывать нужно только версию из сегмента: документ, который
+        # есть лишь в журнале, иначе вычитался бы из числа документов
+        if self.segment.doc_length(doc_id):
+            self._deleted.add(doc_id)
+        if record['op'] == 'put':
+            self._docs[doc_id] = (record['terms'], record['length'])
+            for term in record['terms']:
+                self._terms[term].add(doc_id)
+
+    def _append(self, records):
+        os.makedirs(self.directory, exist_ok=True)
+        lines = ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        )
+        if not lines:
+            return
+        # Одна запись в файл, открытый на дозапись, не перемешивается
+        # с записями других процессов
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            journal.write(lines)
+
+    def put(self, documents):
+        """Добавить или заменить документы: пары (id, список основ)."""
+        self._append(
+            {'op': 'put', 'id': doc_id, 'terms': Counter(tokens),
+             'length': len(tokens)}
+            for doc_id, tokens in documents
+        )
+
+    def delete(self, doc_ids):
+        self._append({'op': 'delete', 'id': doc_id} for doc_id in doc_ids)
+
+    def _rotate_journal(self):
+        """Начать журнал заново; прежний действует до замены сегмента."""
+        os.makedirs(self.directory, exist_ok=True)
+        rotated = self._rotated_path(self._segment_signature())
+        if not os.path.exists(rotated):
+            try:
+                os.replace(self.journal_path, rotated)
+            except FileNotFoundError:
+                pass
+        else:
+            # Прошлая сборка не завершилась: журнал дописывается
+            # к прежнему, чтобы записи шли по порядку
+            current = f'{rotated}.tmp'
+            try:
+                os.replace(self.journal_path, current)
+            except FileNotFoundError:
+                pass
+            else:
+                with open(current, 'rb') as journal, \
+                        open(rotated, 'ab') as previous:
+                    previous.write(journal.read())
+                os.remove(current)
+        open(self.journal_path, 'a').close()
+        return rotated
+
+    def write_segment(self, documents):
+        """Собрать сегмент из всех документов и начать журнал заново.
+
+        Журнал поворачивается до чтения документов: изменения, сделанные
+        во время сборки, попадают в новый журнал и не теряются.
+        """
+        rotated = self._rotate_journal()
+        postings = defaultdict(list)
+        lengths = {}
+        for doc_id, tokens in documents:
+            for term, frequency in Counter(tokens).items():
+                postings[term].append((doc_id, frequency))
+            lengths[doc_id] = len(tokens)
+        write_segment(self.segment_path, postings, lengths)
+        if os.path.exists(rotated):
+            os.remove(rotated)
+        return len(lengths)
+
+    def count(self):
+        """Число актуальных документов: сегмент с поправкой на журнал."""
+        return self.segment.docs + len(self._docs) - len(self._deleted)
+
+    def _matches(self, term):
+        """{id: tf} актуальных документов со словом."""
+        hidden = self._deleted
+        found = {
+            doc_id: frequency
+            for doc_id, frequency in self.segment.postings(term)
+            if doc_id not in hidden
+        }
+        for doc_id in self._terms.get(term, ()):
+            found[doc_id] = self._docs[doc_id][0][term]
+        return found
+
+    def _doc_length(self, doc_id):
+        if doc_id in self._docs:
+            return self._docs[doc_id][1]
+        return self.segment.doc_length(doc_id)
+
+    def search(self, terms):
+        """id документов со всеми словами, по убыванию tf-idf."""
+        with self._lock:
+            self._refresh()
+            total = max(self.count(), 1)
+            scores = {}
+            for number, term in enumerate(set(terms)):
+                matches = self._matches(term)
+                if number:
+                    matches = {doc_id: frequency
+                               for doc_id, frequency in matches.items()
+                               if doc_id in scores}
+                if not matches:
+                    return []
+                idf = math.log(1 + total / len(matches))
+                scores = {
+                    doc_id: scores.get(doc_id, 0)
+                    + (1 + math.log(frequency)) * idf
+                    for doc_id, frequency in matches.items()
+                }
+            return sorted(
+                scores,
+                key=lambda doc_id: (
+                    -scores[doc_id]
+                    / math.sqrt(max(self._doc_length(doc_id), 1)),
+                    -doc_id,
+                ),
+            )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(directory):
+    """Один индекс на каталог в процессе — сегмент отображается один раз."""
+    with _indexes_lock:
+        if directory not in _indexes:
+            _indexes[directory] = InvertedIndex(directory)
+        return _indexes[directory]
+
+
+def documents(post_ids=None):
+    """Пары (id, основы слов) постов вместе с их комментариями."""
+    if post_ids is None:
+        last = 0
+        while True:
+            batch = list(Post.objects.filter(pk__gt=last).order_by(
+                'pk').values_list('pk', 'text')[:BATCH_SIZE])
+            if not batch:
+                return
+            yield from _with_comments(batch)
+            last = batch[-1][0]
+    post_ids = sorted(set(post_ids))
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        yield from _with_comments(
+            Post.objects.filter(pk__in=post_ids[start:start + BATCH_SIZE])
+            .order_by('pk').values_list('pk', 'text')
+        )
+
+
+def _with_comments(posts):
+    texts = {pk: [text] for pk, text in posts}
+    for post_id, text in Comment.objects.filter(
+        post_id__in=list(texts)
+    ).values_list('post_id', 'text'):
+        texts[post_id].append(text)
+    for pk, parts in texts.items():
+        yield pk, tokenize('\n'.join(parts))
+
+
+class InProcessSearchBackend(BaseSearchBackend):
+    """
+    Поиск по тексту постов и комментариев с русской морфологией.
+
+    Индекс пишется после фиксации транзакции, поэтому откат не оставляет
+    в журнале несуществующих изменений. Каталог индекса задаёт
+    настройка POSTS_SEARCH_INDEX_DIR.
+    """
+
+    def __init__(self):
+        self.index = get_index(settings.POSTS_SEARCH_INDEX_DIR)
+
+    def update(self, post_ids):
+        post_ids = list(post_ids)
+        transaction.on_commit(lambda: self._update(post_ids))
+
+    def _update(self, post_ids):
+        found = list(documents(post_ids))
+        self.index.put(found)
+        self.index.delete(set(post_ids) - {doc_id for doc_id, _ in found})
+
+    def remove(self, post_ids):
+        post_ids = list(post_ids)
+        transaction.on_commit(lambda: self.index.delete(post_ids))
+
+    def rebuild(self):
+        return self.index.write_segment(documents())
+
+    def search(self, query, limit, offset=0, author_id=None, group_id=None):
+        ranked = self.index.search(tokenize(query)[:MAX_TERMS])
+        if author_id is None and group_id is None:
+            return ranked[offset:offset + limit]
+        # Фильтры проверяются в базе пачками, пока не наберётся страница
+        filters = {}
+        if author_id is not None:
+            filters['author_id'] = author_id
+        if group_id is not None:
+            filters['group_id'] = group_id
+        found = []
+        for start in range(0, len(ranked), BATCH_SIZE):
+            batch = ranked[start:start + BATCH_SIZE]
+            allowed = set(Post.objects.filter(
+                pk__in=batch, **filters
+            ).values_list('pk', flat=True))
+            found.extend(doc_id for doc_id in batch if doc_id in allowed)
+            if len(found) >= offset + limit:
+                break
+        return found[offset:offset + limit]
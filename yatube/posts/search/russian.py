@@ -0,0 +1,84 @@
+"""
+Разбиение текста на слова и стемминг для русского языка.
+
+Стеммер — алгоритм Snowball (Porter) для русского: отрезает окончания
+и суффиксы, так что «войны», «войной» и «войне» дают одну основу.
+Слова не на кириллице остаются как есть.
+"""
+import re
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile(r'^[а-я]+$')
+MAX_WORD_LENGTH = 64
+
+VOWELS = 'аеиоуыэюя'
+RV_RE = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVE_GERUND_RE = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE_RE = re.compile(r'(с[яь])$')
+ADJECTIVE_RE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE_RE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB_RE = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло'
+    r'|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN_RE = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием'
+    r'|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+I_RE = re.compile(r'и$')
+DERIVATIONAL_RE = re.compile(rf'.*[^{VOWELS}]+[{VOWELS}].*ость?$')
+DERIVATIONAL_SUFFIX_RE = re.compile(r'ость?$')
+SUPERLATIVE_RE = re.compile(r'(ейше|ейш)$')
+SOFT_SIGN_RE = re.compile(r'ь$')
+DOUBLE_N_RE = re.compile(r'нн$')
+
+
+def stem(word):
+    if not CYRILLIC_RE.match(word):
+        return word
+    match = RV_RE.match(word)
+    if match is None:
+        return word
+    prefix, rv = match.groups()
+
+    # Шаг 1: деепричастие, иначе возвратность и окончания
+    # прилагательного (причастия), глагола или существительного
+    stripped = PERFECTIVE_GERUND_RE.sub('', rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE_RE.sub('', rv, 1)
+        stripped = ADJECTIVE_RE.sub('', rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE_RE.sub('', stripped, 1)
+        else:
+            stripped = VERB_RE.sub('', rv, 1)
+            rv = NOUN_RE.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+
+    # Шаги 2–4: «и», словообразовательный суффикс, превосходная
+    # степень, «нн» и мягкий знак
+    rv = I_RE.sub('', rv, 1)
+    if DERIVATIONAL_RE.match(rv):
+        rv = DERIVATIONAL_SUFFIX_RE.sub('', rv, 1)
+    stripped = SOFT_SIGN_RE.sub('', rv, 1)
+    if stripped == rv:
+        rv = SUPERLATIVE_RE.sub('', rv, 1)
+        rv = DOUBLE_N_RE.sub('н', rv, 1)
+    else:
+        rv = stripped
+    return prefix + rv
+
+
+def tokenize(text):
+    """Основы слов текста по порядку, с повторами."""
+    return [
+        stem(word)
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+        if len(word) <= MAX_WORD_LENGTH
+    ]
@@ -0,0 +1,218 @@
+"""
+Неизменяемый сегмент инвертированного индекса на диске.
+
+Файл открывается через mmap, и все таблицы читаются прямо из отображённой
+памяти: при старте процесса ничего не разбирается и не перестраивается,
+в память попадают только страницы, к которым обращается запрос.
+
+Формат (little-endian, секции выровнены по 8 байт):
+
+    MAGIC, длина заголовка (uint32), заголовок в JSON
+    term_offsets   uint32[terms + 1] — начала слов в terms
+    terms          отсортированные по байтам слова в UTF-8
+    posting_offsets uint64[terms + 1] — начала списков в postings
+    df             uint32[terms] — в скольких документах встречается слово
+    postings       для каждого слова пары (разность id документа, tf)
+                   в varint
+    doc_lengths    uint16[max_doc + 1] — длина документа в словах
+"""
+import json
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b'YTSEARCH'
+VERSION = 1
+ALIGNMENT = 8
+MAX_DOC_LENGTH = 0xFFFF
+
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_postings(postings):
+    """[(id, tf), ...] по возрастанию id -> байты со сдвигами id."""
+    out = bytearray()
+    previous = 0
+    for doc_id, frequency in postings:
+        encode_varint(doc_id - previous, out)
+        encode_varint(frequency, out)
+        previous = doc_id
+    return bytes(out)
+
+
+def decode_postings(data):
+    """Обратное к encode_postings: пары (id, tf)."""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    doc_id = 0
+    for position in range(0, len(values), 2):
+        doc_id += values[position]
+        yield doc_id, values[position + 1]
+
+
+def _aligned(buffer):
+    buffer.write(b'\0' * (-buffer.tell() % ALIGNMENT))
+    return buffer.tell()
+
+
+def write_segment(path, postings, doc_lengths, meta=None):
+    """
+    Записать сегмент атомарно: во временный файл, затем os.replace.
+
+    postings — {слово: [(id, tf), ...]} с id по возрастанию,
+    doc_lengths — {id: число слов}.
+    """
+    terms = sorted(term.encode() for term in postings)
+    max_doc = max(doc_lengths, default=0)
+    lengths = array('H', bytes(2 * (max_doc + 1)))
+    for doc_id, length in doc_lengths.items():
+        lengths[doc_id] = min(length, MAX_DOC_LENGTH)
+
+    term_offsets = array('I', [0])
+    posting_offsets = array('Q', [0])
+    df = array('I')
+    blobs = []
+    for term in terms:
+        term_offsets.append(term_offsets[-1] + len(term))
+        term_postings = postings[term.decode()]
+        blob = encode_postings(term_postings)
+        blobs.append(blob)
+        posting_offsets.append(posting_offsets[-1] + len(blob))
+        df.append(len(term_postings))
+
+    sections = [
+        ('term_offsets', term_offsets.tobytes()),
+        ('terms', b''.join(terms)),
+        ('posting_offsets', posting_offsets.tobytes()),
+        ('df', df.tobytes()),
+        ('postings', b''.join(blobs)),
+        ('doc_lengths', lengths.tobytes()),
+    ]
+    header = {
+        'version': VERSION,
+        'term_count': len(terms),
+        'doc_count': len(doc_lengths),
+        'total_length': sum(doc_lengths.values()),
+        'max_doc': max_doc,
+        **(meta or {}),
+    }
+    # Смещения секций зависят от длины заголовка, а заголовок —
+    # от смещений; место под них резервируется пробелами
+    offsets_size = len(json.dumps(
+        {name: [2 ** 63, 2 ** 63] for name, _ in sections}
+    ))
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as segment:
+        segment.write(MAGIC)
+        segment.write(b'\0' * 4)
+        segment.write(b' ' * (len(json.dumps(header)) + offsets_size + 1))
+        for name, data in sections:
+            header[name] = [_aligned(segment), len(data)]
+            segment.write(data)
+        encoded = json.dumps(header).encode()
+        segment.seek(len(MAGIC))
+        segment.write(struct.pack('<I', len(encoded)))
+        segment.write(encoded)
+        segment.flush()
+        os.fsync(segment.fileno())
+    os.replace(temporary, path)
+
+
+class Segment:
+    """Сегмент, отображённый в память; пустой, если файла нет."""
+
+    def __init__(self, path):
+        self.header = {'term_count': 0, 'doc_count': 0, 'total_length': 0,
+                       'max_doc': -1}
+        self._mmap = None
+        try:
+            with open(path, 'rb') as segment:
+                self._mmap = mmap.mmap(segment.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path}: не сегмент поискового индекса')
+        start = len(MAGIC)
+        (size,) = struct.unpack_from('<I', self._mmap, start)
+        self.header = json.loads(self._mmap[start + 4:start + 4 + size])
+        self._view = memoryview(self._mmap)
+
+        def section(name, typecode=None):
+            offset, length = self.header[name]
+            data = self._view[offset:offset + length]
+            return data.cast(typecode) if typecode else data
+
+        self._term_offsets = section('term_offsets', 'I')
+        self._terms = section('terms')
+        self._posting_offsets = section('posting_offsets', 'Q')
+        self._df = section('df', 'I')
+        self._postings = section('postings')
+        self._doc_lengths = section('doc_lengths', 'H')
+
+    @property
+    def docs(self):
+        return self.header['doc_count']
+
+    @property
+    def total_length(self):
+        return self.header['total_length']
+
+    def _term_at(self, position):
+        return bytes(self._terms[
+            self._term_offsets[position]:self._term_offsets[position + 1]
+        ])
+
+    def _find(self, term):
+        encoded = term.encode()
+        low, high = 0, self.header['term_count']
+        while low < high:
+            middle = (low + high) // 2
+            if self._term_at(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.header['term_count'] and self._term_at(low) == encoded:
+            return low
+        return None
+
+    def df(self, term):
+        position = self._find(term) if self._mmap else None
+        return 0 if position is None else self._df[position]
+
+    def postings(self, term):
+        """Пары (id, tf) документов со словом."""
+        position = self._find(term) if self._mmap else None
+        if position is None:
+            return iter(())
+        return decode_postings(self._postings[
+            self._posting_offsets[position]:
+            self._posting_offsets[position + 1]
+        ])
+
+    def doc_length(self, doc_id):
+        if doc_id > self.header['max_doc']:
+            return 0
+        return self._doc_lengths[doc_id]
+
+    def close(self):
+        if self._mmap is not None:
+            # Таблицы — срезы mmap; их нужно отпустить до закрытия
+            for name in ('_term_offsets', '_terms', '_posting_offsets',
+                         '_df', '_postings', '_doc_lengths', '_view'):
+                getattr(self, name).release()
+            self._mmap.close()
+            self._mmap = None
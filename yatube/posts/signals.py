@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import timelines
+from .cache import touch_version
+from .counters import change_user_stats
+from .models import Comment, Follow, Group, Post, UserStats
+from .search import get_backend
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    # Срабатывает и при удалении через админку (в том числе массовом),
+    # и при каскадном удалении вместе с постом
+    Post.objects.filter(
+        pk=instance.post_id, comments_count__gt=0
+    ).update(comments_count=F('comments_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        change_user_stats(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        change_user_stats(instance.author_id, 'followers_count', 1)
+        change_user_stats(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, 'followers_count', -1)
+    change_user_stats(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feed_cache(sender, **kwargs):
+    # Кэшированные фрагменты лент содержат ключ версии 'feed',
+    # после её смены они больше не используются
+    touch_version('feed')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, update_fields, **kwargs):
+    # Имя автора выводится в лентах и фидах; вход пользователя
+    # обновляет только last_login и кэш не сбрасывает
+    if update_fields != frozenset({'last_login'}):
+        touch_version('feed')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, **kwargs):
+    # От подписок зависят счётчики и кнопка «Подписаться»
+    # на страницах профиля и поста
+    touch_version('follow')
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timelines.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timelines.backfill_timeline(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def drop_author_from_timeline(sender, instance, **kwargs):
+    timelines.drop_author(instance.user_id, instance.author_id)
+    # Автор только что перестал быть «популярным»: его посты больше
+    # не подмешиваются при чтении, раскладываем их по лентам
+    if UserStats.objects.filter(
+        user_id=instance.author_id,
+        followers_count=settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        timelines.fan_out_author(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    get_backend().update([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reindex_commented_post(sender, instance, **kwargs):
+    get_backend().update([instance.post_id])
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, **kwargs):
+    if not created:
+        get_backend().update(
+            instance.posts.values_list('pk', flat=True).iterator()
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_posts(sender, instance, **kwargs):
+    # После удаления сообщества связь с постами уже потеряна
+    instance._search_post_ids = list(
+        instance.posts.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def reindex_former_group_posts(sender, instance, **kwargs):
+    get_backend().update(getattr(instance, '_search_post_ids', []))
+
+
+@receiver(post_save, sender=User)
+def reindex_author_posts(sender, instance, created, update_fields,
+                         **kwargs):
+    # Вход пользователя обновляет только last_login — индекс не меняется
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    get_backend().update(
+        instance.posts.values_list('pk', flat=True).iterator()
+    )
@@ -0,0 +1,43 @@
+from django import template
+
+from posts.cache import get_or_compute, make_key
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, timeout, name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        if timeout is not None:
+            timeout = int(timeout)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_key('fragment', self.name, *vary_on),
+            lambda: self.nodelist.render(context),
+            timeout, name=self.name,
+        )
+
+
+@register.tag
+def cachedfragment(parser, token):
+    """
+    {% cachedfragment timeout name [vary_on ...] %} — как {% cache %},
+    но фрагмент пересчитывает один запрос (posts.cache.get_or_compute).
+    """
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает как минимум два аргумента."
+        )
+    return CachedFragmentNode(
+        nodelist, parser.compile_filter(bits[1]), bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **kwargs):
+    """Фрагмент, зависящий от пользователя (см. posts.holes)."""
+    return mark_safe(holes.render_hole(context, template_name, kwargs))
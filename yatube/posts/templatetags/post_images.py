@@ -0,0 +1,10 @@
+from django import template
+
+from posts.thumbnails import cached_picture
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(image, sizes='100vw'):
+    return {'picture': cached_picture(image), 'sizes': sizes}
@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import (AsyncClient, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from http import HTTPStatus
+
+from posts import async_views
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='yatube.asgi_urls')
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(title='Стихи', slug='poems')
+        cls.author = User.objects.create_user('anna')
+        cls.reader = User.objects.create_user('boris')
+        cls.post = Post.objects.create(text='Стихотворение',
+                                       author=cls.author, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+        self.reader_client = AsyncClient()
+        self.reader_client.force_login(self.reader)
+
+    async def test_read_views_are_async(self):
+        """Под ASGI-схемой читающие адреса ведут в асинхронные view."""
+        pages = {
+            reverse('posts:index'): async_views.index,
+            reverse('posts:group_posts', args=['poems']):
+                async_views.group_posts,
+            reverse('posts:profile', args=['anna']): async_views.profile,
+            reverse('posts:post', args=[self.post.pk]):
+                async_views.post_view,
+            reverse('posts:follow_index'): async_views.follow_index,
+        }
+        for url, view in pages.items():
+            with self.subTest(url=url):
+                response = await self.reader_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIs(response.resolver_match.func, view)
+                self.assertEqual(
+                    list(response.context['page_obj'])
+                    if 'page_obj' in response.context
+                    else [response.context['a_post']],
+                    [self.post],
+                )
+
+    async def test_profile_context(self):
+        """Профиль показывает счётчики автора и подписку читателя."""
+        response = await self.reader_client.get(
+            reverse('posts:profile', args=['anna'])
+        )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['author_stats'].posts_count, 1)
+        self.assertEqual(response.context['author_stats'].followers_count, 1)
+
+    async def test_missing_objects_raise_404(self):
+        """Несуществующие сообщество, автор и пост дают 404."""
+        lookups = (
+            (Group.objects.all(), {'slug': 'missing'}),
+            (User.objects.all(), {'username': 'missing'}),
+            (Post.objects.all(), {'id': self.post.pk + 1}),
+        )
+        for queryset, kwargs in lookups:
+            with self.subTest(model=queryset.model):
+                with self.assertRaises(Http404):
+                    await async_views._get_or_404(queryset, **kwargs)
+
+    async def test_follow_index_requires_login(self):
+        """Лента подписок гостя перенаправляет на вход."""
+        response = await self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(response.url.startswith(reverse('login')))
+
+    async def test_conditional_get(self):
+        """Асинхронные view тоже отвечают 304 на совпавший ETag."""
+        url = reverse('posts:index')
+        response = await self.client.get(url)
+        self.assertIn('ETag', response.headers)
+        # AsyncClient в Django 4.1 передаёт extra как заголовки как есть
+        response = await self.client.get(
+            url, **{'if-none-match': response.headers['ETag']}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+
+async def asgi_get(application, path, received=None):
+    """GET-запрос к ASGI-приложению: (статус, тело).
+
+    В список received, если он передан, попадают сообщения с телом.
+    """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    disconnected = asyncio.Event()
+    statuses, body = [], []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        else:
+            body.append(message.get('body', b''))
+            if received is not None:
+                received.append(message)
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return statuses[0], b''.join(body).decode()
+
+
+class AsgiStreamingTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('anna')
+        group = Group.objects.create(title='Стихи', slug='poems')
+        Post.objects.create(text='Стихотворение', author=author, group=group)
+
+    def test_streaming_responses(self):
+        """API и ленты, читающие базу по ходу ответа, работают под ASGI."""
+        from yatube.asgi import application
+
+        for path in ('/api/v1/posts/', '/feed/rss/',
+                     '/group/poems/feed/atom/'):
+            with self.subTest(path=path):
+                status, body = async_to_sync(asgi_get)(application, path)
+                self.assertEqual(status, HTTPStatus.OK)
+                self.assertIn('Стихотворение', body)
+
+        received = []
+        status, body = async_to_sync(asgi_get)(
+            application, '/api/v1/posts/', received
+        )
+        self.assertEqual(json.loads(body)['results'][0]['text'],
+                         'Стихотворение')
+        # Части ответа уходят по мере чтения, последнее сообщение — пустое
+        self.assertGreaterEqual(len(received), 2)
+        self.assertTrue(all(message['more_body']
+                            for message in received[:-1]))
+        self.assertFalse(received[-1].get('body'))
+        self.assertFalse(received[-1].get('more_body'))
+
+    def test_pages(self):
+        """HTML-страницы под ASGI отдаются целиком."""
+        from yatube.asgi import application
+
+        for path in ('/', '/group/poems/', '/profile/anna/'):
+            with self.subTest(path=path):
+                status, body = async_to_sync(asgi_get)(application, path)
+                self.assertEqual(status, HTTPStatus.OK)
+                self.assertIn('Стихотворение', body)
+                self.assertTrue(body.rstrip().endswith('</html>'))
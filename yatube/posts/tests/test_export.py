@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportContentTest(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.author = User.objects.create_user('anna', first_name='Анна')
+        self.reader = User.objects.create_user('boris')
+        self.group = Group.objects.create(title='Стихи', slug='poems',
+                                          description='Поэзия')
+        self.post = Post.objects.create(text='Стихотворение',
+                                        author=self.author, group=self.group)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Браво')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def export(self, *args, name='dump.ndjson.gz'):
+        path = os.path.join(self.directory, name)
+        call_command('export_content', path, *args, stdout=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as dump:
+            return path, [json.loads(line) for line in dump]
+
+    def test_export_matches_import_format(self):
+        """Выгрузка загружается обратно import_content."""
+        path, records = self.export()
+
+        self.assertEqual([record['type'] for record in records],
+                         ['user', 'user', 'group', 'post', 'follow'])
+        self.assertEqual(records[3]['comments'][0]['text'], 'Браво')
+
+        pub_date = self.post.pub_date
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        call_command('import_content', path, stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(post.author.first_name, 'Анна')
+        self.assertEqual(post.group.slug, 'poems')
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertEqual(post.comments.get().author.username, 'boris')
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_restored_users_can_log_in(self):
+        """Из выгрузки восстанавливаются пароли и флаги пользователей."""
+        self.author.set_password('секрет')
+        self.author.is_staff = True
+        self.author.save()
+        self.reader.is_active = False
+        self.reader.save()
+        joined = self.author.date_joined
+        path, _ = self.export()
+
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        call_command('import_content', path, stdout=StringIO())
+
+        author = User.objects.get(username='anna')
+        self.assertTrue(author.check_password('секрет'))
+        self.assertTrue(author.is_staff)
+        self.assertEqual(author.date_joined, joined)
+        self.assertFalse(User.objects.get(username='boris').is_active)
+
+    def test_incremental_export(self):
+        """С --since выгружаются только изменённые посты."""
+        since = timezone.now()
+        old = Post.objects.create(text='Старый', author=self.author)
+        Post.objects.filter(pk=old.pk).update(
+            updated=since - timedelta(days=1)
+        )
+        Post.objects.filter(pk=self.post.pk).update(
+            updated=since - timedelta(days=1)
+        )
+        new = Post.objects.create(text='Новый', author=self.author)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Спасибо')
+
+        _, records = self.export(f'--since={since.isoformat()}')
+
+        posts = [record['id'] for record in records
+                 if record['type'] == 'post']
+        self.assertEqual(posts, [self.post.pk, new.pk])
+        self.assertFalse([record for record in records
+                          if record['type'] == 'user'])
+
+    def test_restore_incremental_with_keep_ids(self):
+        path, _ = self.export()
+        since = timezone.now()
+        self.post.text = 'Исправленное стихотворение'
+        self.post.save()
+        incremental, _ = self.export(f'--since={since.isoformat()}',
+                                     name='incremental.ndjson.gz')
+
+        Post.objects.all().delete()
+        call_command('import_content', path, '--keep-ids',
+                     stdout=StringIO())
+        deleted = []
+
+        def receiver(sender, **kwargs):
+            deleted.append(sender)
+
+        post_delete.connect(receiver, sender=Comment)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Comment)
+        call_command('import_content', incremental, '--keep-ids',
+                     stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(post.pk, self.post.pk)
+        self.assertEqual(post.text, 'Исправленное стихотворение')
+        self.assertEqual(post.comments.count(), 1)
+        self.assertEqual(post.comments_count, 1)
+        # Заменённые комментарии удаляются без сигналов
+        self.assertEqual(deleted, [])
+
+    def test_keep_ids_recounts_comments_without_rebuild(self):
+        """Повторная загрузка с --keep-ids сама пересчитывает комментарии."""
+        path, _ = self.export()
+        Post.objects.all().delete()
+
+        for _ in range(2):
+            call_command('import_content', path, '--keep-ids',
+                         '--skip-rebuild', stdout=StringIO())
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comments.count(), 1)
+        self.assertEqual(post.comments_count, 1)
+
+    def test_media_manifest(self):
+        Post.objects.filter(pk=self.post.pk).update(image='posts/none.jpg')
+        manifest = os.path.join(self.directory, 'media.ndjson')
+
+        self.export(f'--media-manifest={manifest}')
+
+        with open(manifest, encoding='utf-8') as lines:
+            self.assertEqual([json.loads(line) for line in lines],
+                             [{'name': 'posts/none.jpg', 'missing': True}])
@@ -0,0 +1,114 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def parse(response):
+    return ElementTree.fromstring(b''.join(response.streaming_content))
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('poet', first_name='Анна')
+        cls.group = Group.objects.create(title='Стихи', slug='poems',
+                                         description='Поэзия')
+        cls.posts = [
+            Post.objects.create(text=f'Строка {number}', author=cls.author,
+                                group=cls.group if number < 2 else None)
+            for number in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rss_index(self):
+        response = self.client.get(reverse('posts:index_feed',
+                                           args=['rss']))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/rss+xml'))
+        titles = [item.findtext('title')
+                  for item in parse(response).iter('item')]
+        self.assertEqual(titles, ['Строка 3', 'Строка 2', 'Строка 1',
+                                  'Строка 0'])
+
+    def test_atom_group_and_profile(self):
+        """Фиды сообщества и автора содержат только их записи."""
+        group = parse(self.client.get(
+            reverse('posts:group_feed', args=[self.group.slug, 'atom'])
+        ))
+        self.assertEqual(len(group.findall(f'{ATOM}entry')), 2)
+        self.assertEqual(group.findtext(f'{ATOM}title'), 'Yatube: Стихи')
+
+        profile = parse(self.client.get(
+            reverse('posts:profile_feed', args=[self.author.username,
+                                                'atom'])
+        ))
+        entry = profile.find(f'{ATOM}entry')
+        self.assertEqual(entry.findtext(f'{ATOM}author/{ATOM}name'), 'Анна')
+        self.assertEqual(len(profile.findall(f'{ATOM}entry')), 4)
+
+    def test_limit(self):
+        feed = parse(self.client.get(
+            reverse('posts:index_feed', args=['rss']), {'limit': 1}
+        ))
+
+        self.assertEqual(len(list(feed.iter('item'))), 1)
+
+    def test_edited_post_is_rendered_again(self):
+        """Запись в кэше привязана ко времени изменения поста."""
+        url = reverse('posts:index_feed', args=['rss'])
+        b''.join(self.client.get(url).streaming_content)
+
+        post = self.posts[3]
+        post.text = 'Новая строка'
+        post.save()
+
+        feed = parse(self.client.get(url))
+        self.assertEqual(next(feed.iter('item')).findtext('title'),
+                         'Новая строка')
+
+    def test_renamed_author_is_rendered_again(self):
+        """Переименование автора меняет записи и версию фида."""
+        url = reverse('posts:index_feed', args=['atom'])
+        etag = self.client.get(url)['ETag']
+
+        self.author.first_name = 'Мария'
+        self.author.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        names = {entry.findtext(f'{ATOM}author/{ATOM}name')
+                 for entry in parse(response).iter(f'{ATOM}entry')}
+        self.assertEqual(names, {'Мария'})
+
+    def test_scheme_is_part_of_item_key(self):
+        """Записи для http и https кэшируются отдельно."""
+        url = reverse('posts:index_feed', args=['rss'])
+        b''.join(self.client.get(url).streaming_content)
+
+        feed = parse(self.client.get(url, secure=True))
+
+        self.assertTrue(all(item.findtext('link').startswith('https://')
+                            for item in feed.iter('item')))
+
+    def test_conditional_get(self):
+        url = reverse('posts:index_feed', args=['atom'])
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
@@ -4,11 +4,14 @@ import tempfile
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Group, Post
+from posts import thumbnails
+from posts.thumbnails import cached_picture
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -128,3 +131,32 @@ class PostCreateFormTests(TestCase):
                 group=self.form_data_editing_post['group']
             ).exists()
         )
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_thumbnail_generated_after_create(self):
+        """Миниатюры создаются после сохранения поста, а не при рендере."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:new_post'),
+                data=self.form_data_new_post,
+            )
+        new_post = Post.objects.get(text=self.form_data_new_post['text'])
+
+        self.assertTrue(new_post.image)
+        picture = cached_picture(new_post.image)
+        self.assertIsNotNone(picture)
+        self.assertEqual(picture['srcset'].count('w,'), 2)
+        self.assertIn('image/webp',
+                      [source['type'] for source in picture['sources']])
+
+    def test_rolled_back_thumbnail_is_not_pending(self):
+        """Откат транзакции не оставляет файл в очереди миниатюр."""
+        post = Post(text='Откат', author=self.user,
+                    image='posts/rolled-back.jpg')
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                thumbnails.schedule_thumbnails(post.image)
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        self.assertNotIn('posts/rolled-back.jpg', thumbnails._pending)
@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+RECORDS = [
+    {'type': 'user', 'username': 'anna', 'first_name': 'Анна'},
+    {'type': 'user', 'username': 'boris'},
+    {'type': 'group', 'slug': 'poems', 'title': 'Стихи'},
+    {'type': 'post', 'text': 'Первый пост', 'author': 'anna',
+     'group': 'poems', 'pub_date': '2020-01-01T10:00:00+00:00',
+     'image': 'cat.gif',
+     'comments': [{'author': 'boris', 'text': 'Отлично',
+                   'created': '2020-01-02T10:00:00+00:00'}]},
+    {'type': 'post', 'text': 'Второй пост', 'author': 'anna',
+     'pub_date': '2020-02-01T10:00:00+00:00'},
+    {'type': 'post', 'text': 'Чужой', 'author': 'nobody'},
+    {'type': 'follow', 'user': 'boris', 'author': 'anna'},
+]
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImportContentTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'dump.ndjson')
+        with open(self.path, 'w', encoding='utf-8') as dump:
+            for record in RECORDS:
+                dump.write(json.dumps(record, ensure_ascii=False) + '\n')
+        with open(os.path.join(self.directory, 'cat.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+
+    def run_import(self, *args, **options):
+        stdout = StringIO()
+        call_command('import_content', self.path, *args, stdout=stdout,
+                     stderr=StringIO(), **options)
+        return stdout.getvalue()
+
+    def test_import(self):
+        """Записи загружаются со ссылками, датами и картинками."""
+        output = self.run_import('--batch-size=3',
+                                 f'--images-dir={self.directory}')
+
+        anna = User.objects.get(username='anna')
+        first = Post.objects.get(text='Первый пост')
+        self.assertEqual(first.author, anna)
+        self.assertEqual(first.group, Group.objects.get(slug='poems'))
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertEqual(first.updated, first.pub_date)
+        self.assertEqual(first.image.name, 'posts/cat.gif')
+        self.assertEqual(first.comments_count, 1)
+        self.assertEqual(Comment.objects.get().created.day, 2)
+        self.assertTrue(Follow.objects.filter(
+            user__username='boris', author=anna).exists())
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+        self.assertEqual(anna.stats.posts_count, 2)
+        self.assertIn('пропущено записей: 1', output)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск пропускает уже загруженные записи."""
+        User.objects.create_user('anna')
+        with open(f'{self.path}.checkpoint', 'w') as checkpoint:
+            json.dump({'records': 4}, checkpoint)
+
+        self.run_import()
+
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Второй пост'])
+
+    def test_import_is_idempotent_for_users_groups_and_follows(self):
+        self.run_import()
+        self.run_import()
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_csv(self):
+        path = os.path.join(self.directory, 'groups.csv')
+        with open(path, 'w', encoding='utf-8') as dump:
+            dump.write('slug,title,description\nprose,Проза,Рассказы\n')
+
+        call_command('import_content', path, '--csv=group',
+                     stdout=StringIO())
+
+        self.assertEqual(Group.objects.get().title, 'Проза')
+
+    def test_broken_dump(self):
+        with open(self.path, 'a', encoding='utf-8') as dump:
+            dump.write('{broken\n')
+
+        with self.assertRaises(CommandError):
+            self.run_import()
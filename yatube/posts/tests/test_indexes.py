@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTest(TestCase):
+    """Основные запросы лент идут по индексам, без полного сканирования."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.group = Group.objects.create(
+            title='Сообщество для планов запросов',
+            slug='plans'
+        )
+        cls.author = User.objects.create_user('plan_author')
+        cls.reader = User.objects.create_user('plan_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+        for number in range(15):
+            cls.post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def main_query(self, url, table):
+        """Первый запрос страницы, который сортирует строки таблицы."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if f'FROM "{table}"' in sql and 'ORDER BY' in sql:
+                return sql
+        self.fail(f'Не найден запрос к {table} для {url}')
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        pages = {
+            reverse('posts:index'): 'posts_post',
+            reverse('posts:group_posts',
+                    kwargs={'slug': self.group.slug}): 'posts_post',
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}): 'posts_post',
+            reverse('posts:follow_index'): 'posts_post',
+            reverse('posts:post',
+                    kwargs={'post_id': self.post.pk}): 'posts_comment',
+        }
+        for url, table in pages.items():
+            with self.subTest(url=url):
+                plan = self.query_plan(self.main_query(url, table))
+                for step in plan:
+                    self.assertNotIn('TEMP B-TREE', step, plan)
+                    if step.startswith(('SCAN', 'SEARCH')):
+                        self.assertRegex(
+                            step, 'USING (COVERING |INTEGER PRIMARY KEY|'
+                                  'INDEX )', plan
+                        )
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_hybrid_follow_feed_uses_indexes(self):
+        """Смешанная лента ищет посты по индексам обеих частей условия."""
+        sql = self.main_query(reverse('posts:follow_index'), 'posts_post')
+        plan = self.query_plan(sql)
+
+        self.assertIn('MULTI-INDEX OR', plan)
+        # Сортировка во временном B-дереве здесь допустима: в нём только
+        # посты из ленты пользователя и посты его популярных авторов
+        for step in plan:
+            if step.startswith('SCAN'):
+                self.fail(plan)
+        self.assertIn('SEARCH posts_post USING INDEX '
+                      'post_author_pub_date_idx (author_id=?)', plan)
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.counters import get_user_stats
+from posts.models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -37,3 +41,76 @@ class StrModelTest(TestCase):
         expected_output = StrModelTest.group.title
         self.assertEqual(group_str, expected_output,
                          'Метод __str__ модели Group работает неправильно')
+
+
+class CommentsCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user('commentator')
+        cls.post = Post.objects.create(
+            text='Пост для проверки счётчика комментариев',
+            author=cls.user
+        )
+
+    def test_counter_follows_comments(self):
+        """Счётчик comments_count меняется при создании и удалении."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Первый'
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Второй')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_recount_counters_repairs_drift(self):
+        """Команда recount_counters исправляет рассинхронизацию."""
+        Comment.objects.create(post=self.post, author=self.user, text='Один')
+        Post.objects.filter(pk=self.post.pk).update(comments_count=42)
+
+        call_command('recount_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user('stats_author')
+        cls.follower = User.objects.create_user('stats_follower')
+        Post.objects.create(text='Пост до появления статистики',
+                            author=cls.author)
+
+    def test_stats_follow_posts_and_subscriptions(self):
+        """Счётчики UserStats меняются вместе с постами и подписками."""
+        stats = get_user_stats(self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 0)
+
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(get_user_stats(self.follower).following_count, 1)
+
+        post.delete()
+        follow.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_recount_counters_repairs_user_stats(self):
+        get_user_stats(self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+
+        call_command('recount_counters', stdout=StringIO())
+
+        self.assertEqual(get_user_stats(self.author).posts_count, 1)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import holes
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer')
+        cls.reader = User.objects.create_user('reader')
+        cls.post = Post.objects.create(text='Закэшированный пост',
+                                       author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_anonymous_hit_renders_nothing(self):
+        """Повторная страница для гостя отдаётся из кэша без запросов."""
+        url = reverse('posts:profile', args=['writer'])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.templates, [])
+        self.assertContains(second, reverse('login'))
+
+    def test_users_get_their_own_fragments(self):
+        """Из одной записи кэша каждый получает свои навигацию и кнопки."""
+        url = reverse('posts:profile', args=['writer'])
+        self.client.get(url)
+
+        reader = self.reader_client.get(url)
+        author = self.author_client.get(url)
+        guest = self.client.get(url)
+
+        self.assertContains(reader, 'Мой профиль: @reader')
+        self.assertContains(reader, 'Отписаться')
+        self.assertContains(author, 'Мой профиль: @writer')
+        self.assertContains(
+            author, reverse('posts:post_edit', args=[self.post.pk])
+        )
+        self.assertNotContains(author, 'Подписаться')
+        self.assertContains(guest, 'Подписаться')
+        self.assertNotContains(guest, 'Мой профиль')
+        for response in (reader, author, guest):
+            self.assertNotContains(response, '<!--hole:')
+
+    def test_comment_form_gets_fresh_csrf_token(self):
+        """Форма комментария рендерится с CSRF-токеном каждого запроса."""
+        url = reverse('posts:post', args=[self.post.pk])
+        self.reader_client.get(url)
+
+        response = self.reader_client.get(url)
+
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(self.client.get(url), 'csrfmiddlewaretoken')
+
+    def test_new_post_invalidates_pages(self):
+        """Новый пост меняет версию ленты, и страница рендерится заново."""
+        url = reverse('posts:index')
+        self.client.get(url)
+
+        Post.objects.create(text='Свежий пост', author=self.author)
+
+        self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_page_with_placeholder_is_not_stored_by_browser(self):
+        """Страницу с заглушкой вместо миниатюры браузер не сохраняет."""
+        Post.objects.create(text='С картинкой', author=self.author,
+                            image='posts/not-ready.jpg')
+        url = reverse('posts:profile', args=['writer'])
+
+        for response in (self.client.get(url), self.client.get(url)):
+            self.assertContains(response, 'thumbnail-placeholder.svg')
+            self.assertIn('no-store', response['Cache-Control'])
+        self.assertNotIn('Cache-Control', self.client.get(
+            reverse('posts:post', args=[self.post.pk])
+        ))
+
+    def test_forged_marker_is_dropped(self):
+        """Неподписанная метка не рендерит фрагмент."""
+        forged = signing.dumps(['includes/user_nav.html', {}], salt='forged')
+        content = holes.fill_holes(
+            holes.MARKER.format(forged), RequestFactory().get('/')
+        )
+        self.assertEqual(content, '')
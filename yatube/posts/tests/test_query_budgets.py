@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    """Число SQL-запросов страниц не превышает бюджет из QUERY_BUDGETS."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.group = Group.objects.create(
+            title='Сообщество для бюджетов',
+            slug='budgets'
+        )
+        cls.author = User.objects.create_user('budget_author')
+        cls.reader = User.objects.create_user('budget_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+        # Постов и комментариев больше, чем на одной странице:
+        # N+1 сразу выйдет за бюджет
+        for number in range(settings.POSTS_PER_PAGE + 5):
+            cls.post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Комментарий'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_views_fit_query_budgets(self):
+        pages = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_posts': reverse(
+                'posts:group_posts', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'posts:post': reverse(
+                'posts:post', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:new_post': reverse('posts:new_post'),
+            'about:author': reverse('about:author'),
+            'signup': reverse('signup'),
+        }
+        for view_name, url in pages.items():
+            for client in (self.guest_client, self.authorized_client):
+                with self.subTest(view=view_name, client=client):
+                    response = client.get(url)
+                    self.assertLessEqual(
+                        response.metrics.queries,
+                        settings.QUERY_BUDGETS[view_name]
+                    )
+
+    def test_metrics_endpoint(self):
+        self.guest_client.get(reverse('posts:index'))
+
+        response = self.guest_client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, 'yatube_requests_total{view="posts:index",status="200"}'
+        )
+        self.assertContains(
+            response, 'yatube_template_render_seconds_total'
+            '{template="index.html"}'
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        """С заданным METRICS_TOKEN метрики отдаются только с токеном."""
+        url = reverse('metrics')
+        for header in ('', 'Bearer other', 'Basic secret'):
+            with self.subTest(header=header):
+                response = self.guest_client.get(
+                    url, HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(response.status_code, 403)
+
+        response = self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
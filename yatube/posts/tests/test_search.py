@@ -0,0 +1,294 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+from posts.search import backend_path, get_backend
+from posts.search.inprocess import InvertedIndex, documents
+from posts.search.russian import stem, tokenize
+from posts.search.segment import decode_postings, encode_postings
+
+User = get_user_model()
+
+
+class FTS5SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            'leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Классика', slug='classics', description='Книги'
+        )
+        cls.war = Post.objects.create(
+            text='Война и мир: роман о войне 1812 года',
+            author=cls.author, group=cls.group,
+        )
+        cls.peace = Post.objects.create(
+            text='Мирная жизнь в деревне', author=cls.author,
+        )
+
+    def search(self, query, **kwargs):
+        return get_backend().search(query, limit=10, **kwargs)
+
+    def test_finds_by_text_author_and_group(self):
+        """Ищется по тексту, автору и названию сообщества."""
+        self.assertEqual(self.search('роман'), [self.war.pk])
+        self.assertCountEqual(self.search('толстой'),
+                              [self.war.pk, self.peace.pk])
+        self.assertEqual(self.search('классика'), [self.war.pk])
+
+    def test_prefix_match_and_all_terms_required(self):
+        self.assertEqual(self.search('войн'), [self.war.pk])
+        self.assertEqual(self.search('мир деревн'), [self.peace.pk])
+        self.assertEqual(self.search('роман деревн'), [])
+
+    def test_match_in_text_ranks_above_comment(self):
+        """Совпадение в тексте поста весит больше, чем в комментарии."""
+        Comment.objects.create(post=self.war, author=self.author,
+                               text='Читал про деревню')
+
+        self.assertEqual(self.search('деревн'), [self.peace.pk, self.war.pk])
+
+    def test_filters_by_group_and_author(self):
+        self.assertEqual(self.search('толстой', group_id=self.group.pk),
+                         [self.war.pk])
+        other = User.objects.create_user('other')
+        self.assertEqual(self.search('толстой', author_id=other.pk), [])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при сохранении и удалении записей."""
+        Comment.objects.create(post=self.peace, author=self.author,
+                               text='Прекрасный пейзаж')
+        self.assertEqual(self.search('пейзаж'), [self.peace.pk])
+
+        self.peace.text = 'Осенний сад'
+        self.peace.save()
+        self.assertEqual(self.search('деревне'), [])
+        self.assertEqual(self.search('сад'), [self.peace.pk])
+
+        self.group.title = 'Проза'
+        self.group.save()
+        self.assertEqual(self.search('проза'), [self.war.pk])
+
+        self.war.delete()
+        self.assertEqual(self.search('роман'), [])
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(self.search('роман'), [self.war.pk])
+
+    def test_view_paginates_results(self):
+        for number in range(12):
+            Post.objects.create(text=f'Заметка номер {number}',
+                                author=self.author)
+        url = reverse('posts:search')
+
+        first = self.client.get(url, {'q': 'заметка'})
+        second = self.client.get(url, {'q': 'заметка', 'page': 2})
+
+        self.assertEqual(first.status_code, HTTPStatus.OK)
+        self.assertEqual(len(first.context['page_obj']), 10)
+        self.assertTrue(first.context['page_obj'].has_next())
+        self.assertEqual(len(second.context['page_obj']), 2)
+        self.assertFalse(second.context['page_obj'].has_next())
+        self.assertContains(second, 'q=%D0%B7%D0%B0%D0%BC%D0%B5%D1%82%D0%BA'
+                                    '%D0%B0&amp;page=1')
+
+    def test_view_survives_huge_page_number(self):
+        """Номер страницы, переполняющий OFFSET, не роняет поиск."""
+        response = self.client.get(reverse('posts:search'),
+                                   {'q': 'война', 'page': '9' * 20})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+
+@override_settings(
+    POSTS_SEARCH_BACKEND='posts.search.database.DatabaseSearchBackend'
+)
+class DatabaseSearchTest(TestCase):
+    def test_like_fallback(self):
+        author = User.objects.create_user('writer')
+        post = Post.objects.create(text='Про Django', author=author)
+        Comment.objects.create(post=post, author=author, text='Спасибо')
+
+        response = self.client.get(reverse('posts:search'),
+                                   {'q': 'Спасибо'})
+
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+
+class BackendChoiceTest(TestCase):
+    def test_fts5_probe_matches_migration(self):
+        """Бэкенд и миграция одинаково решают, есть ли FTS5."""
+        migration = import_module('posts.migrations.0011_search_index')
+
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        self.assertEqual('posts_search' in tables,
+                         migration.fts5_available(connection))
+        self.assertEqual(backend_path() == settings.POSTS_SEARCH_BACKEND,
+                         migration.fts5_available(connection))
+
+    def test_fallback_without_fts5(self):
+        """Без FTS5 в SQLite поиск идёт через индекс в файлах."""
+        with mock.patch('posts.search.fts5_available', return_value=False):
+            self.assertEqual(backend_path(),
+                             'posts.search.inprocess.InProcessSearchBackend')
+
+
+class RussianTokenizerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова дают одну основу."""
+        for words in (('война', 'войны', 'войной'),
+                      ('деревня', 'деревне', 'деревню'),
+                      ('читал', 'читали')):
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Ёлки и Django!'),
+                         ['елк', 'и', 'django'])
+
+
+INDEX_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    POSTS_SEARCH_BACKEND='posts.search.inprocess.InProcessSearchBackend',
+    POSTS_SEARCH_INDEX_DIR=INDEX_DIR,
+)
+class InProcessSearchTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(INDEX_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user('chekhov')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.garden = Post.objects.create(
+                text='Вишнёвый сад продают за долги', author=self.author
+            )
+            self.house = Post.objects.create(
+                text='Дом с мезонином', author=self.author
+            )
+        get_backend().rebuild()
+
+    def search(self, query, **kwargs):
+        return get_backend().search(query, limit=10, **kwargs)
+
+    def test_postings_roundtrip(self):
+        postings = [(3, 1), (130, 2), (100000, 7)]
+
+        self.assertEqual(list(decode_postings(encode_postings(postings))),
+                         postings)
+
+    def test_finds_word_forms_from_segment(self):
+        """Поиск по сегменту учитывает формы слов."""
+        self.assertEqual(self.search('садом'), [self.garden.pk])
+        self.assertEqual(self.search('долгами продать'), [self.garden.pk])
+        self.assertEqual(self.search('сад дом'), [])
+
+    def test_incremental_updates(self):
+        """Изменения после сборки сегмента попадают в журнал."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.house, author=self.author,
+                                   text='Мисюсь, где ты?')
+            self.garden.text = 'Чайка'
+            self.garden.save()
+            post = Post.objects.create(text='Три сестры',
+                                       author=self.author)
+
+        self.assertEqual(self.search('мисюсь'), [self.house.pk])
+        self.assertEqual(self.search('сад'), [])
+        self.assertEqual(self.search('сестрами'), [post.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+
+        self.assertEqual(self.search('сестры'), [])
+
+    def test_other_process_sees_journal_and_new_segment(self):
+        """Журнал и новый сегмент подхватываются без перезапуска."""
+        other = InvertedIndex(INDEX_DIR)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(text='Палата номер шесть',
+                                       author=self.author)
+
+        self.assertEqual(other.search(tokenize('палата')), [post.pk])
+
+        get_backend().rebuild()
+
+        self.assertEqual(os.path.getsize(os.path.join(INDEX_DIR,
+                                                      'journal.log')), 0)
+        self.assertEqual(other.search(tokenize('палата')), [post.pk])
+
+    def test_journal_only_documents_are_counted(self):
+        """Документы только из журнала учитываются в числе документов."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(text='Чайка', author=self.author)
+            post = Post.objects.create(text='Дядя Ваня', author=self.author)
+            self.garden.text = 'Сад продан'
+            self.garden.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+            self.house.delete()
+
+        index = InvertedIndex(INDEX_DIR)
+        index.search(tokenize('сад'))
+
+        self.assertEqual(index.count(), 2)
+
+    def test_changes_during_rebuild_are_kept(self):
+        """Изменения, сделанные во время сборки сегмента, не теряются."""
+        other = InvertedIndex(INDEX_DIR)
+        with self.captureOnCommitCallbacks(execute=True):
+            gull = Post.objects.create(text='Чайка', author=self.author)
+        created = []
+
+        def snapshot():
+            yield from documents()
+            with self.captureOnCommitCallbacks(execute=True):
+                created.append(Post.objects.create(
+                    text='Палата номер шесть', author=self.author
+                ))
+            # Пока сегмент старый, действует и прежний журнал
+            for index in (other, InvertedIndex(INDEX_DIR)):
+                self.assertEqual(index.search(tokenize('чайка')), [gull.pk])
+                self.assertEqual(index.search(tokenize('палата')),
+                                 [created[0].pk])
+
+        get_backend().index.write_segment(snapshot())
+
+        self.assertEqual(self.search('палата'), [created[0].pk])
+        self.assertEqual(other.search(tokenize('палата')), [created[0].pk])
+        self.assertEqual(other.search(tokenize('чайка')), [gull.pk])
+        self.assertEqual(os.listdir(INDEX_DIR).count('journal.log'), 1)
+        self.assertEqual(len(os.listdir(INDEX_DIR)), 2)
+
+    def test_ranking_and_filters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rich = Post.objects.create(text='Сад, сад, весь сад в цвету',
+                                       author=self.author)
+            other = Post.objects.create(
+                text='Старый сад весь в цвету',
+                author=User.objects.create_user('other'),
+            )
+
+        self.assertEqual(self.search('сад')[0], rich.pk)
+        self.assertNotIn(other.pk, self.search('сад',
+                                               author_id=self.author.pk))
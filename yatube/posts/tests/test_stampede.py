@@ -0,0 +1,145 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.metrics import registry
+from posts.cache import (aget_or_compute, get_or_compute, make_key,
+                         placeholder_shown)
+
+
+def requests(name, result):
+    key = ('cache_requests', (('cache', name), ('result', result)))
+    return registry.counters[key]
+
+
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'значение {self.calls}'
+
+    def put(self, key, value, expires_in, delta=0.1):
+        cache.set(key, {'value': value, 'delta': delta,
+                        'expires': time.time() + expires_in})
+
+    def test_hit_and_miss(self):
+        """Значение считается один раз, дальше читается из кэша."""
+        for _ in range(3):
+            value = get_or_compute('key', self.compute, 60, name='test')
+
+        self.assertEqual(value, 'значение 1')
+        self.assertEqual(requests('test', 'miss'), 1)
+        self.assertEqual(requests('test', 'hit'), 2)
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи ждут один пересчёт."""
+        barrier = threading.Barrier(4)
+        results = []
+
+        def slow_compute():
+            time.sleep(0.3)
+            return self.compute()
+
+        def work():
+            barrier.wait()
+            results.append(get_or_compute('key', slow_compute, 60,
+                                          name='test'))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['значение 1'] * 4)
+        self.assertEqual(requests('test', 'coalesced'), 3)
+
+    def test_stale_value_served_while_recomputing(self):
+        """Пока запись пересчитывает другой запрос, отдаётся старая."""
+        self.put('key', 'старое', expires_in=-1)
+        cache.add(make_key('lock', 'key'), 1)
+
+        value = get_or_compute('key', self.compute, 60, name='test')
+
+        self.assertEqual(value, 'старое')
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(requests('test', 'stale'), 1)
+
+    def test_early_expiration(self):
+        """Дорогую запись перед сроком пересчитывают заранее."""
+        self.put('key', 'старое', expires_in=5, delta=2)
+
+        with mock.patch('posts.cache.random.random', return_value=0):
+            self.assertEqual(get_or_compute('key', self.compute, 60),
+                             'старое')
+        with mock.patch('posts.cache.random.random',
+                        return_value=0.999):
+            self.assertEqual(get_or_compute('key', self.compute, 60),
+                             'значение 1')
+
+    def test_none_is_not_cached(self):
+        """None из compute не кэшируется."""
+        for _ in range(2):
+            get_or_compute('key', lambda: self.compute() and None, 60)
+
+        self.assertEqual(self.calls, 2)
+        self.assertIsNone(cache.get(make_key('lock', 'key')))
+
+    @override_settings(THUMBNAIL_PLACEHOLDER_TIMEOUT=5)
+    def test_placeholder_shortens_timeout(self):
+        """Запись с заглушкой и записи вокруг неё живут недолго."""
+        def with_placeholder():
+            placeholder_shown()
+            return self.compute()
+
+        get_or_compute('outer', lambda: get_or_compute(
+            'inner', with_placeholder, 600
+        ), 600)
+        get_or_compute('plain', self.compute, 600)
+
+        deadline = time.time() + 5
+        self.assertLessEqual(cache.get('inner')['expires'], deadline)
+        self.assertLessEqual(cache.get('outer')['expires'], deadline)
+        self.assertGreater(cache.get('plain')['expires'], deadline + 500)
+
+    async def test_async(self):
+        """Асинхронный вариант тоже кэширует результат."""
+        async def compute():
+            return self.compute()
+
+        for _ in range(2):
+            value = await aget_or_compute('key', compute, 60, name='test')
+
+        self.assertEqual(value, 'значение 1')
+        self.assertEqual(requests('test', 'hit'), 1)
+
+
+class CachedFragmentTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_fragment_is_rendered_once(self):
+        """{% cachedfragment %} рендерит фрагмент один раз на ключ."""
+        template = Template(
+            '{% load fragments %}'
+            '{% cachedfragment 60 sample version %}{{ text }}'
+            '{% endcachedfragment %}'
+        )
+
+        first = template.render(Context({'version': 1, 'text': 'один'}))
+        second = template.render(Context({'version': 1, 'text': 'два'}))
+        third = template.render(Context({'version': 2, 'text': 'три'}))
+
+        self.assertEqual((first, second, third), ('один', 'один', 'три'))
+        self.assertEqual(requests('sample', 'hit'), 1)
+        self.assertEqual(requests('sample', 'miss'), 2)
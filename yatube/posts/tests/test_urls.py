@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 
 from posts.models import Group, Post
@@ -25,6 +26,9 @@ class URLsTest(TestCase):
         )
 
     def setUp(self):
+        # Страницы кэшируются целиком, и на попадание шаблоны
+        # не рендерятся — проверяемые ниже шаблоны не были бы видны
+        cache.clear()
         self.guest_client = Client()
 
         self.user = User.objects.create_user(username='petia_iv')
@@ -1,5 +1,7 @@
+import base64
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -8,9 +10,11 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 from http import HTTPStatus
 
-from posts.models import Comment, Follow, Group, Post
+from posts.cache import make_key
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -268,6 +272,84 @@ class PaginatorViewsTest(TestCase):
             )
 
 
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.posts_author = User.objects.create_user('cursor_author')
+
+        for post in range(0, 13):
+            Post.objects.create(
+                text=f'Пост для проверки курсорной пагинации {post}',
+                author=cls.posts_author,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_cursor_navigation(self):
+        """Курсоры ведут на следующую и обратно на предыдущую страницу."""
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        self.assertEqual(len(first_page), 10)
+        self.assertFalse(first_page.has_previous())
+
+        second_page = self.guest_client.get(
+            url, {'after': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertEqual(second_page.number, 2)
+        self.assertFalse(second_page.has_next())
+        self.assertFalse(
+            set(first_page.object_list) & set(second_page.object_list)
+        )
+
+        back_page = self.guest_client.get(
+            url, {'before': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(back_page.object_list, first_page.object_list)
+        self.assertEqual(back_page.number, 1)
+
+    def test_broken_cursor_leads_to_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'after': 'не-курсор'}
+        )
+        self.assertEqual(response.context['page_obj'].number, 1)
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_crafted_cursors_do_not_break_feed(self):
+        """Курсоры с огромными числами и пустым ключом не роняют ленту."""
+        date = Post.objects.first().pub_date.isoformat()
+        cursors = {
+            'число страниц Infinity': '[["%s", 1], Infinity]' % date,
+            'число страниц 1e400': '[["%s", 1], 1e400]' % date,
+            'огромный id': '[["%s", %d], 2]' % (date, 10 ** 30),
+            'пустой ключ': '[[null, null], 2]',
+            'ключ-список': '[[[1], {"a": 1}], 2]',
+        }
+        for name, raw in cursors.items():
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            for param in ('after', 'before'):
+                with self.subTest(cursor=name, param=param):
+                    response = self.guest_client.get(
+                        reverse('posts:index'), {param: cursor}
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertLessEqual(
+                        response.context['page_obj'].number, 10 ** 6
+                    )
+
+    def test_huge_page_number_leads_to_first_page(self):
+        """Номер страницы, переполняющий OFFSET, не роняет ленту."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'page': '9' * 20}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+
 class TestPostAdded(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -375,21 +457,191 @@ class TestCache(TestCase):
     def setUp(self):
         self.post = TestCache.post
         self.guest_client = Client()
+        cache.clear()
 
     def test_cache(self):
-        response_1 = self.guest_client.get(reverse('index'))
+        response_1 = self.guest_client.get(reverse('posts:index'))
         latest_post = response_1.context['page_obj'][0]
         self.assertEqual(latest_post, self.post)
 
+        response_2 = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response_1.content, response_2.content)
+
+        # Удаление поста меняет версию ленты — кэш сбрасывать не нужно
         latest_post.delete()
 
-        response_2 = self.guest_client.get(reverse('index'))
-        self.assertEqual(response_1.content, response_2.content)
+        response_3 = self.guest_client.get(reverse('posts:index'))
+        self.assertNotEqual(response_2.content, response_3.content)
+        self.assertNotContains(response_3, self.post.text)
+
+    def test_cache_is_page_aware(self):
+        for number in range(settings.POSTS_PER_PAGE):
+            Post.objects.create(text=f'Пост номер {number}', author=self.user)
 
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'), {'page': 2})
+
+        self.assertContains(response, self.post.text)
+
+
+class TestConditionalGet(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('Mr. ETag')
+        cls.reader = User.objects.create_user('Reader')
+        cls.post = Post.objects.create(text='Пост с ETag', author=cls.author)
+
+    def setUp(self):
         cache.clear()
+        self.client.force_login(self.reader)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_304(self):
+        """Неизменившаяся страница отдаётся как 304 без шаблона."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post', args=[self.post.id]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertFalse(response.templates)
 
-        response_3 = self.guest_client.get(reverse('index'))
-        self.assertNotEqual(response_2.content, response_3.content)
+    def test_new_comment_changes_etag(self):
+        url = reverse('posts:post', args=[self.post.id])
+        etag = self.client.get(url)['ETag']
+
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Новый комментарий')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_etag(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        etag = self.client.get(url)['ETag']
+
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+
+        response = Client().get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_last_modified_is_rounded_up(self):
+        """Last-Modified не раньше момента изменения данных."""
+        cache.set(make_key('version', 'feed'), 1000.2, None)
+
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertEqual(response['Last-Modified'], http_date(1001))
+
+    def test_same_second_writes_do_not_get_stale_304(self):
+        """Два изменения в одну секунду не дают устаревшего 304."""
+        url = reverse('posts:index')
+        version = make_key('version', 'feed')
+        with mock.patch('time.time', return_value=1000.9):
+            cache.set(version, 1000.2, None)
+            first = self.client.get(url)
+            cache.set(version, 1000.7, None)
+            second = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=http_date(1001)
+            )
+        with mock.patch('time.time', return_value=1001.5):
+            third = self.client.get(url)
+
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(second.status_code, HTTPStatus.OK)
+        self.assertEqual(third['Last-Modified'], http_date(1001))
+
+
+class TestTimeline(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.reader = User.objects.create_user('timeline_reader')
+        cls.author = User.objects.create_user('timeline_author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_page_posts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return response.context['page_obj'].object_list
+
+    def test_post_fanned_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+        old_post = Post.objects.create(text='Старый пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post_id', flat=True)),
+            {old_post.pk, new_post.pk}
+        )
+        self.assertEqual(self.follow_page_posts(), [new_post, old_post])
+
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page_posts(), [])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_read_on_the_fly(self):
+        """Посты популярного автора подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост популярного', author=self.author)
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page_posts(), [post])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_hybrid_timeline_merges_both_sources(self):
+        """Разложенные посты и посты популярного автора идут по дате."""
+        popular = User.objects.create_user('timeline_popular')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=popular)
+        Follow.objects.create(
+            user=User.objects.create_user('timeline_fan'), author=popular
+        )
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=author)
+            for number, author in enumerate(
+                [self.author, popular, self.author, popular]
+            )
+        ]
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.follow_page_posts(), posts[::-1])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_backfill_is_capped(self):
+        """При подписке в ленту попадают только последние посты автора."""
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            for number in range(3)
+        ]
+
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        self.assertEqual(self.follow_page_posts(), posts[:0:-1])
 
 
 class Test404(TestCase):
@@ -0,0 +1,154 @@
+"""Миниатюры изображений постов, подготовленные заранее.
+
+sorl-thumbnail по умолчанию создаёт миниатюру при первом рендере
+шаблона, то есть внутри запроса к ленте. Здесь миниатюры создаются
+в фоновом пуле потоков сразу после сохранения поста, а шаблоны только
+читают готовый результат из кэша и на промахе показывают заглушку.
+Записи кэша с заглушкой живут недолго (posts.cache.placeholder_shown),
+поэтому готовая миниатюра не сбрасывает кэш остальных страниц.
+
+Для каждого изображения создаётся набор ширин (RESPONSIVE_WIDTHS) в JPEG
+и в современных форматах, которые поддерживает установленный Pillow
+(WebP, AVIF), — шаблоны отдают их через <picture> и srcset.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from PIL import Image
+from sorl.thumbnail import base, default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from .cache import make_key, placeholder_shown
+
+logger = logging.getLogger(__name__)
+
+# Пропорции карточки поста в ленте и ширины вариантов для srcset
+FEED_WIDTH, FEED_HEIGHT = 960, 339
+RESPONSIVE_WIDTHS = (320, 640, 960)
+# Современные форматы в порядке предпочтения: первый подходящий
+# браузер выберет сам по <source type=...>
+MODERN_FORMATS = (('AVIF', 'image/avif'), ('WEBP', 'image/webp'))
+
+_executor = None
+_executor_lock = threading.Lock()
+# Имена исходных файлов, для которых генерация уже запланирована;
+# множество меняют и запросы, и потоки пула — только под _pending_lock
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    """Бэкенд sorl, который умеет сохранять миниатюры ещё и в AVIF."""
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        if options['format'] == 'AVIF':
+            name = super()._get_thumbnail_filename(
+                source, geometry_string, {**options, 'format': 'WEBP'}
+            )
+            return f'{name.rsplit(".", 1)[0]}.avif'
+        return super()._get_thumbnail_filename(
+            source, geometry_string, options
+        )
+
+
+def supported_formats():
+    """Современные форматы, которые умеет записывать Pillow."""
+    Image.init()
+    return [(name, mime) for name, mime in MODERN_FORMATS
+            if name in Image.SAVE]
+
+
+def _variant(width, image_format):
+    height = round(width * FEED_HEIGHT / FEED_WIDTH)
+    return f'{width}x{height}', {
+        'crop': 'center', 'upscale': True, 'format': image_format,
+    }
+
+
+def build_picture(name):
+    """Создать все варианты изображения и описание для <picture>."""
+    def srcset(image_format):
+        variants = []
+        for width in RESPONSIVE_WIDTHS:
+            geometry, options = _variant(width, image_format)
+            thumbnail = default.backend.get_thumbnail(
+                name, geometry, **options
+            )
+            variants.append(f'{thumbnail.url} {width}w')
+        return ', '.join(variants)
+
+    fallback = thumbnail_settings.THUMBNAIL_FORMAT
+    geometry, options = _variant(FEED_WIDTH, fallback)
+    return {
+        'src': default.backend.get_thumbnail(name, geometry, **options).url,
+        'srcset': srcset(fallback),
+        'sources': [
+            {'type': mime, 'srcset': srcset(image_format)}
+            for image_format, mime in supported_formats()
+        ],
+        'width': FEED_WIDTH,
+        'height': FEED_HEIGHT,
+    }
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def generate_thumbnails(name):
+    """Создать все варианты миниатюр для файла изображения."""
+    try:
+        cache.set(make_key('picture', name), build_picture(name), None)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        with _pending_lock:
+            _pending.discard(name)
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+def _submit(name):
+    # Имя отмечается только после фиксации: при откате транзакции
+    # оно не останется в _pending навсегда
+    with _pending_lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if settings.THUMBNAIL_WORKERS:
+        _get_executor().submit(generate_thumbnails, name)
+    else:
+        generate_thumbnails(name)
+
+
+def schedule_thumbnails(image):
+    """Запланировать создание миниатюр после фиксации транзакции."""
+    if not image:
+        return
+    name = image.name
+    with _pending_lock:
+        if name in _pending:
+            return
+    transaction.on_commit(lambda: _submit(name))
+
+
+def cached_picture(image):
+    """Готовое описание <picture> или None; на промахе планирует его."""
+    if not image:
+        return None
+    picture = cache.get(make_key('picture', image.name))
+    if picture is None:
+        placeholder_shown()
+        schedule_thumbnails(image)
+    return picture
@@ -0,0 +1,152 @@
+"""Ленты подписок с раздачей постов при записи (fan-out-on-write).
+
+Пост обычного автора при публикации сразу раскладывается по лентам
+его подписчиков (TimelineEntry), и чтение ленты — это выборка по
+индексу одной таблицы вместо соединения Follow и Post. Авторов, у
+которых подписчиков больше TIMELINE_FANOUT_MAX_FOLLOWERS, не
+раскладываем: их посты подмешиваются в ленту при чтении.
+
+Поэтому лента подписок (follow_index) показывает от обычного автора
+все посты, опубликованные после подписки, но из более ранних — только
+последние TIMELINE_BACKFILL_LIMIT: столько раскладывается при подписке
+и когда автор перестаёт быть популярным. Посты популярных авторов
+в ленте все.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from .counters import get_user_stats
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+
+# Порядок ленты подписок для CursorPaginator: по аннотациям из
+# timeline_posts, чтобы лента читалась по индексу TimelineEntry
+ORDERING = ('-timeline_date', '-timeline_post')
+
+
+def is_popular(followers_count):
+    return followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def _followers_count(author_id):
+    # Заодно гарантирует, что у автора есть запись UserStats:
+    # по ней при чтении ищутся популярные авторы
+    return get_user_stats(author_id).followers_count
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_post(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_popular(_followers_count(post.author_id)):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert([
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    ])
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-id')
+        .values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    )
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавить в ленту нового подписчика последние посты автора."""
+    if is_popular(_followers_count(author_id)):
+        return
+    _insert([
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in _recent_posts(author_id)
+    ])
+
+
+def fan_out_author(author_id):
+    """Разложить последние посты автора по лентам всех подписчиков.
+
+    Нужно, когда автор перестаёт быть «популярным»: его посты больше
+    не подмешиваются при чтении и должны лежать в лентах.
+    """
+    posts = _recent_posts(author_id)
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        _insert([
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ])
+
+
+def drop_author(user_id, author_id):
+    """Убрать из ленты пользователя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def _popular_authors(user):
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=(
+            settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        ),
+    ).values('author_id')
+
+
+def _timeline(user, popular_authors=None):
+    if popular_authors is not None:
+        # Смешанная лента: материализованная часть плюс посты
+        # популярных авторов, которые читаются напрямую
+        return Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(
+                user=user).values('post_id'))
+            | Q(author_id__in=popular_authors)
+        ).annotate(timeline_date=F('pub_date'), timeline_post=F('pk'))
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        timeline_date=F('timeline_entries__pub_date'),
+        timeline_post=F('timeline_entries__post_id'),
+    )
+
+
+def timeline_posts(user):
+    """Посты ленты подписок пользователя, упорядочивать по ORDERING.
+
+    Ранние посты обычных авторов ограничены TIMELINE_BACKFILL_LIMIT
+    (см. описание модуля).
+    """
+    popular_authors = _popular_authors(user)
+    if popular_authors.exists():
+        return _timeline(user, popular_authors)
+    return _timeline(user)
+
+
+async def atimeline_posts(user):
+    """То же, что timeline_posts, для асинхронных view."""
+    popular_authors = _popular_authors(user)
+    if await popular_authors.aexists():
+        return _timeline(user, popular_authors)
+    return _timeline(user)
+
+
+def rebuild_timelines():
+    """Пересобрать все ленты подписок с нуля.
+
+    Возвращает число созданных записей.
+    """
+    TimelineEntry.objects.all().delete()
+    for follow in Follow.objects.all().iterator():
+        backfill_timeline(follow.user_id, follow.author_id)
+    return TimelineEntry.objects.count()
@@ -1,6 +1,6 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -9,6 +9,13 @@ urlpatterns = [
     path('create/', views.new_post, name='new_post'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    re_path(r'^feed/(?P<kind>rss|atom)/$', feeds.index_feed,
+            name='index_feed'),
+    re_path(r'^group/(?P<slug>[-\w]+)/feed/(?P<kind>rss|atom)/$',
+            feeds.group_feed, name='group_feed'),
+    re_path(r'^profile/(?P<username>[^/]+)/feed/(?P<kind>rss|atom)/$',
+            feeds.profile_feed, name='profile_feed'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_view, name='post'),
     path('posts/<int:post_id>/edit/', views.post_edit,
@@ -1,9 +1,30 @@
+from django.conf import settings
+
+from .counters import aget_user_stats, get_user_stats
+from .holes import punching
 from .models import Follow
+from .paginators import CursorPaginator
+
+
+def get_page_obj(request, posts_list, ordering=None):
+    paginator = CursorPaginator(
+        posts_list, settings.POSTS_PER_PAGE, ordering=ordering
+    )
+    return paginator.get_cursor_page(request.GET)
+
+
+async def aget_page_obj(request, posts_list, ordering=None):
+    paginator = CursorPaginator(
+        posts_list, settings.POSTS_PER_PAGE, ordering=ordering
+    )
+    return await paginator.aget_cursor_page(request.GET)
 
 
 def add_context_to_post_and_profile(request, a_user, context):
+    context['author_stats'] = get_user_stats(a_user)
 
-    if request.user.is_authenticated:
+    # Для кэша страницы кнопка подписки рендерится отдельно (posts.holes)
+    if request.user.is_authenticated and not punching.get():
         following = Follow.objects.filter(
             user=request.user, author=a_user
         ).exists()
@@ -12,6 +33,23 @@ def add_context_to_post_and_profile(request, a_user, context):
         context['following'] = following
         context['authenticated_user'] = authenticated_user
 
+    _add_self_context(request, a_user, context)
+
+
+async def aadd_context_to_post_and_profile(request, a_user, context):
+    """То же для асинхронных view; request.user уже загружен."""
+    context['author_stats'] = await aget_user_stats(a_user)
+
+    if request.user.is_authenticated and not punching.get():
+        context['following'] = await Follow.objects.filter(
+            user=request.user, author=a_user
+        ).aexists()
+        context['authenticated_user'] = True
+
+    _add_self_context(request, a_user, context)
+
+
+def _add_self_context(request, a_user, context):
     if request.user == a_user:
         self_following = True
         editing_permitted = True
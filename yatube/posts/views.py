@@ -1,49 +1,57 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect, render
 
+from core.db import reads_from_replica, writes_to_primary
+
+from .cache import cached_page, conditional_page, feed_cache_context
 from .forms import CommentForm, PostForm
+from .thumbnails import schedule_thumbnails
 from .models import Follow, Group, Post
-from .utils import add_context_to_post_and_profile
+from .paginators import parse_page_number
+from . import timelines
+from .search import search_page
+from .utils import add_context_to_post_and_profile, get_page_obj
 
 User = get_user_model()
 
 
+@reads_from_replica
+@conditional_page('feed')
+@cached_page('feed')
 def index(request):
-    posts_list = Post.objects.prefetch_related(
-        'author', 'group', 'comments'
-    ).all()
-    paginator = Paginator(posts_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts_list = Post.objects.select_related('author', 'group').all()
+    page_obj = get_page_obj(request, posts_list)
+
+    context = {'page_obj': page_obj, **feed_cache_context()}
 
-    return render(request, 'index.html', {'page_obj': page_obj})
+    return render(request, 'index.html', context)
 
 
+@reads_from_replica
+@conditional_page('feed')
+@cached_page('feed')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_posts_list = group.posts.prefetch_related(
-        'author', 'comments'
-    ).all()
-    paginator = Paginator(group_posts_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group_posts_list = group.posts.select_related('author', 'group').all()
+    page_obj = get_page_obj(request, group_posts_list)
 
-    return render(request,
-                  'group_list.html',
-                  {'group': group, 'page_obj': page_obj})
+    context = {'group': group, 'page_obj': page_obj, **feed_cache_context()}
 
+    return render(request, 'group_list.html', context)
 
+
+@reads_from_replica
+@conditional_page('feed', 'follow')
+@cached_page('feed', 'follow')
 def profile(request, username):
     a_user = get_object_or_404(User, username=username)
 
-    a_users_posts = a_user.posts.all()
-    paginator = Paginator(a_users_posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    a_users_posts = a_user.posts.select_related('author', 'group').all()
+    page = get_page_obj(request, a_users_posts)
 
     context = {
         'a_user': a_user,
@@ -56,12 +64,17 @@ def profile(request, username):
     return render(request, 'profile.html', context)
 
 
+@reads_from_replica
+@conditional_page('feed', 'follow')
+@cached_page('feed', 'follow')
 def post_view(request, post_id):
-    a_post = get_object_or_404(Post, id=post_id)
+    a_post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     a_user = a_post.author
 
     form = CommentForm()
-    comments = a_post.comments.all()
+    comments = a_post.comments.select_related('author').all()
 
     context = {
         'a_post': a_post,
@@ -77,15 +90,47 @@ def post_view(request, post_id):
     return render(request, 'post.html', context)
 
 
+@reads_from_replica
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    number = parse_page_number(request.GET.get('page', 1))
+
+    page_obj = search_page(
+        query, number, settings.POSTS_PER_PAGE,
+        author_id=author and author.pk, group_id=group and group.pk,
+    )
+
+    params = request.GET.copy()
+    params.pop('page', None)
+
+    context = {
+        'query': query,
+        'search_params': params.urlencode(),
+        'group': group,
+        'a_user': author,
+        'page_obj': page_obj,
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@writes_to_primary
 def new_post(request):
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
 
         if form.is_valid():
             a_new_post = form.save(commit=False)
             a_new_post.author = request.user
-            a_new_post.save()
+            with transaction.atomic():
+                a_new_post.save()
+            schedule_thumbnails(a_new_post.image)
             return redirect('posts:profile', username=request.user.username)
 
         return render(request, 'new_post.html', {'form': form})
@@ -95,6 +140,7 @@ def new_post(request):
 
 
 @login_required
+@writes_to_primary
 def post_edit(request, post_id):
 
     post_to_be_edited = get_object_or_404(Post, id=post_id)
@@ -107,7 +153,9 @@ def post_edit(request, post_id):
                     instance=post_to_be_edited)
 
     if form.is_valid():
-        form.save()
+        edited_post = form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(edited_post.image)
         return redirect('posts:post', post_id=post_id)
 
     return render(
@@ -119,6 +167,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@writes_to_primary
 def add_comment(request, post_id):
 
     post_to_be_commented = get_object_or_404(Post, id=post_id)
@@ -129,19 +178,23 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post_to_be_commented
-        comment.save()
+        # Комментарий и счётчик comments_count у поста
+        # сохраняются одной транзакцией
+        with transaction.atomic():
+            comment.save()
 
     return redirect('posts:post', post_id=post_id)
 
 
 @login_required
+@reads_from_replica
 def follow_index(request):
-    followed_posts_list = Post.objects.filter(
-        author__following__user=request.user
-    ).prefetch_related('author', 'group', 'comments')
-    paginator = Paginator(followed_posts_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    followed_posts_list = timelines.timeline_posts(
+        request.user
+    ).select_related('author', 'group')
+    page_obj = get_page_obj(
+        request, followed_posts_list, ordering=timelines.ORDERING
+    )
 
     context = {'page_obj': page_obj}
 
@@ -149,21 +202,27 @@ def follow_index(request):
 
 
 @login_required
+@writes_to_primary
 def profile_follow(request, username):
 
     author_to_be_followed = get_object_or_404(User, username=username)
 
     if request.user.username != username:
-        Follow.objects.get_or_create(
-            user=request.user, author=author_to_be_followed
-        )
+        with transaction.atomic():
+            Follow.objects.get_or_create(
+                user=request.user, author=author_to_be_followed
+            )
 
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@writes_to_primary
 def profile_unfollow(request, username):
     followed_author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=followed_author).delete()
+    with transaction.atomic():
+        Follow.objects.filter(
+            user=request.user, author=followed_author
+        ).delete()
 
     return redirect('posts:profile', username=username)
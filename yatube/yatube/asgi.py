@@ -0,0 +1,58 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Ленты и посты здесь отдают асинхронные view (posts.async_views): запросы
+этого сервера разрешаются по yatube.asgi_urls, остальные view те же,
+что и под WSGI. Сервер запускается с YATUBE_CONN_MAX_AGE=0
+(см. DATABASES в settings).
+"""
+
+import os
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django.setup(set_prefix=False)
+
+
+class AsyncViewsRequest(ASGIRequest):
+    urlconf = 'yatube.asgi_urls'
+
+
+class AsyncViewsHandler(ASGIHandler):
+    request_class = AsyncViewsRequest
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # Django 4.1 перебирает потоковый ответ прямо в цикле событий,
+        # а JSON API и RSS/Atom-ленты читают базу по ходу ответа —
+        # части берутся в потоке синхронного кода, а Django отправляет
+        # только заголовки и завершающее сообщение
+        parts = iter(response)
+        response.streaming_content = []
+        next_part = sync_to_async(next, thread_sensitive=True)
+
+        async def send_parts(message):
+            if (message['type'] == 'http.response.body'
+                    and not message.get('more_body')):
+                while (part := await next_part(parts, None)) is not None:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body',
+                                    'body': chunk, 'more_body': True})
+            await send(message)
+
+        await super().send_response(response, send_parts)
+
+
+application = AsyncViewsHandler()
+
+if settings.TEMPLATE_WARMUP:
+    from core.template_loaders import warm_templates
+
+    warm_templates()
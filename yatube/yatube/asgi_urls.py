@@ -0,0 +1,25 @@
+"""URL-схема ASGI-сервера: читающие view постов — асинхронные."""
+from django.urls import include, path
+
+from posts import async_views
+from posts.urls import urlpatterns as posts_urlpatterns
+
+from .urls import handler403, handler404, handler500  # noqa: F401
+from .urls import urlpatterns as sync_urlpatterns
+
+async_posts_urlpatterns = [
+    path('', async_views.index, name='index'),
+    path('group/<slug:slug>/', async_views.group_posts, name='group_posts'),
+    path('follow/', async_views.follow_index, name='follow_index'),
+    path('profile/<str:username>/', async_views.profile, name='profile'),
+    path('posts/<int:post_id>/', async_views.post_view, name='post'),
+]
+
+# Асинхронные маршруты стоят раньше синхронных с теми же адресами,
+# имена у них общие, поэтому reverse() работает как под WSGI
+urlpatterns = [
+    path('', include((async_posts_urlpatterns + posts_urlpatterns,
+                      'posts')))
+    if getattr(pattern, 'namespace', None) == 'posts' else pattern
+    for pattern in sync_urlpatterns
+]
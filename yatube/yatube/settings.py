@@ -26,11 +26,14 @@ INSTALLED_APPS = [
     "posts.apps.PostsConfig",
     "about.apps.AboutConfig",
     "core.apps.CoreConfig",
+    "api.apps.ApiConfig",
+    "benchmarks.apps.BenchmarksConfig",
     "sorl.thumbnail",
     "debug_toolbar",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -38,9 +41,13 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# Панель отладки не умеет работать асинхронно: без DEBUG она только
+# заставляла бы ASGI-сервер переходить в поток на каждом запросе
+if DEBUG:
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 # IP адреса, при обращении с которых будет доступен DjDT
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -52,9 +59,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.InstrumentedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -62,19 +68,70 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Скомпилированные шаблоны кэшируются в процессе
+            # и замеряются по отдельности, включая include
+            "loaders": [
+                ("core.template_loaders.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
         },
     },
 ]
 
+# Воркер компилирует все шаблоны при старте (yatube.wsgi, yatube.asgi),
+# чтобы первые запросы после выкладки не тратили на это время
+TEMPLATE_WARMUP = True
+
+# Панель отладки не видит app_directories.Loader внутри
+# core.template_loaders.Loader, хотя он там есть
+SILENCED_SYSTEM_CHECKS = ["debug_toolbar.W006"]
+
 WSGI_APPLICATION = "yatube.wsgi.application"
+# Под ASGI ленты и посты отдают асинхронные view (posts.async_views)
+ASGI_APPLICATION = "yatube.asgi.application"
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Соединение переиспользуется запросами одного потока до минуты.
+        # Под ASGI нужно YATUBE_CONN_MAX_AGE=0: синхронный код каждого
+        # запроса выполняется в своём потоке, и постоянные соединения
+        # оставались бы в завершённых потоках
+        "CONN_MAX_AGE": int(os.environ.get("YATUBE_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Применяются к каждому новому SQLite-соединению (core.db.configure_sqlite).
+# WAL: читатели не ждут писателя, а писатель — читателей; synchronous=NORMAL
+# в режиме WAL не теряет целостность, fsync только на контрольных точках.
+# Сравнение с настройками SQLite по умолчанию — команда bench_contention.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,  # мс ожидания блокировки вместо «database is locked»
+    "cache_size": -64 * 1024,  # в КиБ, то есть 64 МиБ на соединение
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+# Реплики только для чтения: ленты, профили и посты читаются с них
+# (core.db.reads_from_replica), запись идёт в "default". Реплика
+# добавляется в DATABASES и в этот список, например:
+#   DATABASES["replica"] = {
+#       "ENGINE": "django.db.backends.sqlite3",
+#       "NAME": os.path.join(BASE_DIR, "db.replica.sqlite3"),
+#       "TEST": {"MIRROR": "default"},
+#   }
+#   DATABASE_REPLICAS = ["replica"]
+# и для SQLite поддерживается командой replicate_db --interval 1
+DATABASE_ROUTERS = ["core.db.ReplicaRouter"]
+DATABASE_REPLICAS = []
+# Сколько секунд после записи сессия читает только из основной базы
+DATABASE_REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,6 +163,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static/")  # папка, в которой
 STATICFILES_DIRS = (
     os.path.join(BASE_DIR, "assets"),
 )  # a list of directories where Django will also look for static files
+# collectstatic добавляет к именам хэш содержимого и пишет .gz/.br копии
+STATICFILES_STORAGE = "core.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
@@ -119,12 +178,107 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 POSTS_PER_PAGE = 10
 
+# Записей в RSS/Atom по умолчанию и максимальный ?limit=
+SYNDICATION_ITEMS = 50
+SYNDICATION_MAX_ITEMS = 5000
+
+# Размер страницы JSON API (/api/v1/) по умолчанию и максимальный ?limit=
+API_PAGE_SIZE = POSTS_PER_PAGE
+API_MAX_PAGE_SIZE = 100
+
+# Общее число записей в пагинаторе считается только при включённой настройке
+# и кэшируется на указанное число секунд
+PAGINATOR_APPROXIMATE_COUNT = False
+PAGINATOR_COUNT_CACHE_TIMEOUT = 60 * 5
+
+# Посты авторов, у которых подписчиков больше этого числа, не раскладываются
+# по лентам подписок при публикации, а подмешиваются при чтении
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+# Сколько последних постов автора попадает в ленту при подписке; более
+# ранние посты обычных авторов в ленте подписок не показываются
+TIMELINE_BACKFILL_LIMIT = 100
+
+# Фрагменты лент инвалидируются сигналами (posts.cache),
+# поэтому их можно хранить долго
+FEED_CACHE_TIMEOUT = 60 * 60 * 4
+
+# Страницы index, group_posts, profile и post_view кэшируются целиком
+# (posts.cache.cached_page) и тоже инвалидируются сигналами; срок
+# ограничивает только устаревание имён авторов в карточках
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Защита от одновременного пересчёта (posts.cache.get_or_compute):
+# столько секунд после срока запись ещё отдаётся, пока её пересчитывает
+# один запрос; на столько берётся блокировка пересчёта и не дольше
+# ждут её другие запросы; чем больше BETA, тем раньше срока дорогие
+# записи обновляются заранее
+CACHE_STALE_SECONDS = 60
+CACHE_LOCK_TIMEOUT = 10
+CACHE_XFETCH_BETA = 1.0
+
+# Поисковый индекс постов; без SQLite FTS5 —
+# "posts.search.inprocess.InProcessSearchBackend" (индекс в файлах
+# POSTS_SEARCH_INDEX_DIR) или "posts.search.database.DatabaseSearchBackend"
+POSTS_SEARCH_BACKEND = "posts.search.fts5.FTS5SearchBackend"
+POSTS_SEARCH_INDEX_DIR = os.path.join(BASE_DIR, "search_index")
+
+# Миниатюры изображений создаются в фоне (posts.thumbnails);
+# при 0 потоков — сразу после фиксации транзакции, в том же процессе
+THUMBNAIL_BACKEND = "posts.thumbnails.ThumbnailBackend"
+THUMBNAIL_WORKERS = 2
+# Страницы и фрагменты, где вместо ещё не готовой миниатюры показана
+# заглушка, хранятся в кэше только столько секунд
+THUMBNAIL_PLACEHOLDER_TIMEOUT = 5
+
+# Кэш в файле SQLite общий для всех воркеров (core.cache): попадания
+# и версии данных (posts.cache) у них одни. VERSION увеличивается, когда
+# меняется формат записей, — тогда при поэтапном обновлении старые
+# и новые воркеры не читают записи друг друга. Файл лежит в каталоге
+# YATUBE_CACHE_DIR (по умолчанию var/cache), тесты получают свой
+# временный каталог (core.test_runner.isolated_caches)
+CACHE_DIR = os.environ.get(
+    "YATUBE_CACHE_DIR", os.path.join(BASE_DIR, "var", "cache")
+)
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": "core.cache.SQLiteCache",
+        "LOCATION": os.path.join(CACHE_DIR, "cache.sqlite3"),
+        "KEY_PREFIX": "yatube",
+        "VERSION": 2,
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 50000,
+            "CULL_FREQUENCY": 10,
+            "LRU_RESOLUTION": 1,
+        },
     }
 }
 
+TEST_RUNNER = "core.test_runner.TestRunner"
+
+# Метрики в формате Prometheus (/metrics/) доступны только с этих адресов.
+# За обратным прокси у всех запросов его адрес, поэтому там нужен ещё
+# токен: YATUBE_METRICS_TOKEN, который сборщик метрик передаёт
+# в заголовке "Authorization: Bearer <токен>"
+METRICS_ALLOWED_IPS = [
+    "127.0.0.1",
+]
+METRICS_TOKEN = os.environ.get("YATUBE_METRICS_TOKEN", "")
+
+# Бюджеты SQL-запросов на view: превышение попадает в лог и в метрики,
+# а тесты (posts/tests/test_query_budgets.py) падают
+QUERY_BUDGETS = {
+    "posts:index": 3,
+    "posts:group_posts": 4,
+    "posts:profile": 6,
+    "posts:post": 6,
+    "posts:follow_index": 4,
+    "posts:new_post": 3,
+    "about:author": 2,
+    "about:tech": 2,
+    "signup": 2,
+}
+
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
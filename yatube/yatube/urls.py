@@ -4,7 +4,9 @@ from django.conf.urls import handler403
 from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics, serve_static
 
 
 urlpatterns = [
@@ -13,6 +15,12 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('metrics/', metrics, name='metrics'),
+    # Собранная статика со сжатыми копиями; если её отдаёт веб-сервер,
+    # эти запросы до Django не доходят
+    re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'),
+            serve_static, name='static'),
 ]
 
 handler403 = 'core.views.permission_denied'